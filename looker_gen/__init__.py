@@ -1,5 +1,10 @@
 __version__ = "0.1.0"
 
-from looker_gen.config import import_config, ViewDirectoryStructure
+from looker_gen.config import (
+    import_config,
+    BundleBy,
+    OutputLayout,
+    ViewDirectoryStructure,
+)
 
 config = import_config()
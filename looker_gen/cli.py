@@ -1,19 +1,34 @@
-from typing import Optional, Set
+from pathlib import Path
+from typing import Optional
 
 import click
-import lkml
 
-from looker_gen.files import FileManager
-from looker_gen.generator import LookMLGenerator
-from looker_gen.logging import log
-from looker_gen.looker import linter
+from looker_gen.generator import UnknownModelsError
+from looker_gen.plan import Plan
+from looker_gen.runner import DedupeReport, generate_batch, generate_project
 
 
-def get_schema_targets(schemas: str) -> Optional[Set[str]]:
-    if schemas is None:
-        return None
+def print_plan(plan: Plan) -> None:
+    for diff in plan.diffs:
+        print(diff)
 
-    return {s.lower().strip() for s in schemas.split(",")}
+    for marker, paths in [("+", plan.added), ("~", plan.changed), ("-", plan.orphaned)]:
+        for path in paths:
+            print(f"{marker} {path}")
+
+    print(
+        f"{len(plan.added)} added, {len(plan.changed)} changed, "
+        f"{len(plan.unchanged)} unchanged, {len(plan.orphaned)} orphaned"
+    )
+
+
+def print_dedupe(report: DedupeReport) -> None:
+    saved = report.bytes_before - report.bytes_after
+    percent = 100 * saved / report.bytes_before if report.bytes_before > 0 else 0
+    print(
+        f"Deduplicated {report.views} views into {report.base_views} base views, "
+        f"{report.bytes_before} to {report.bytes_after} bytes ({percent:.0f}% smaller)"
+    )
 
 
 @click.group()
@@ -50,52 +65,156 @@ def cli():
     help="Build lookml only for the provided schemas, comma seperated list",
     type=click.STRING,
 )
-def gen(dbt_dir: str, models: str, output_dir: str, schemas: str) -> None:
+@click.option(
+    "--prune/--no-prune",
+    default=True,
+    help="Delete previously generated files whose dbt model or explore no longer exists. Default is --prune",
+)
+@click.option(
+    "--plan",
+    is_flag=True,
+    help="Report which files would be added, changed or orphaned without writing anything. Exits with status 1 when there are differences",
+)
+@click.option(
+    "--diff",
+    is_flag=True,
+    help="With --plan, print a unified diff of each added or changed file",
+)
+@click.option(
+    "--explores-only",
+    "explores_only",
+    is_flag=True,
+    help="Only regenerate explores, reading just the dbt manifest. Much faster when only explore config has changed",
+)
+@click.option(
+    "--dedupe",
+    is_flag=True,
+    help="Output one base view for models with identical columns, which each model's view extends",
+)
+def gen(
+    dbt_dir: str,
+    models: str,
+    output_dir: str,
+    schemas: str,
+    prune: bool,
+    plan: bool,
+    diff: bool,
+    dedupe: bool,
+    explores_only: bool,
+) -> None:
     """
     Generate LookML files from a dbt project.
     """
 
-    print(f"Using dbt-dir {dbt_dir} and outputting to {output_dir}")
+    if diff and not plan:
+        raise click.UsageError("--diff can only be used with --plan")
 
-    # Can we get some configs from dbt_project.yml?
-    files = FileManager(output_dir)
-    generator = LookMLGenerator(dbt_dir)
-    model_targets = generator.get_model_targets(models)
-    schema_targets = get_schema_targets(schemas=schemas)
+    print(f"Using dbt-dir {dbt_dir} and outputting to {output_dir}")
 
-    for node_name in model_targets:
-        log.debug(f"begin node={node_name}")
-        schema = str(
-            generator.project.get_catalog_metadata_for_node(node_name)["schema"]
+    try:
+        summary = generate_project(
+            dbt_dir,
+            output_dir,
+            models,
+            schemas,
+            prune,
+            plan=plan,
+            diff=diff,
+            dedupe=dedupe,
+            explores_only=explores_only,
         )
+    except UnknownModelsError as e:
+        raise click.BadParameter(str(e), param_hint="'-m' / '--models'")
+    if summary.pruned > 0:
+        print(f"Pruned {summary.pruned} orphaned files")
 
-        if schema_targets is not None and schema.lower() not in schema_targets:
-            log.debug(
-                f"{node_name} schema {schema} does not match target schemas, skipping"
-            )
+    if summary.dedupe is not None:
+        print_dedupe(summary.dedupe)
+
+    if summary.plan is not None:
+        print_plan(summary.plan)
+        if summary.plan.has_changes():
+            raise SystemExit(1)
+
+
+@cli.command(name="gen-batch")
+@click.argument(
+    "config_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+@click.option(
+    "-w",
+    "--workers",
+    help="Number of projects to generate concurrently. Must be at least 1; defaults to `workers` in the config, then the number of CPUs reported by the OS",
+    type=click.IntRange(min=1),
+)
+def gen_batch(config_path: Path, workers: Optional[int]) -> None:
+    """
+    Generate LookML files for many dbt projects, as listed in a yaml config.
+    """
+
+    print(f"Using batch config {config_path}")
+    summaries = generate_batch(config_path, workers)
+
+    row = "{:<30} {:>6} {:>8} {:>6} {:>8} {:>8} {:>8}"
+    print(
+        row.format("project", "views", "explores", "pruned", "load", "render", "total")
+    )
+    for s in summaries:
+        if s.error is not None:
+            print(f"{s.project_name:<30} failed: {s.error}")
             continue
 
-        view = generator.build_view_from_node(node_name, files)
+        seconds = [s.load_seconds, s.render_seconds, s.total_seconds]
+        print(
+            row.format(
+                s.project_name,
+                s.views,
+                len(s.explores),
+                s.pruned,
+                *[f"{t:.2f}s" for t in seconds],
+            )
+        )
+
+    if any(s.error is not None for s in summaries):
+        raise click.ClickException("Failed to generate all projects")
 
-        log.debug(f"Using view_path {view.file_path}")
-        with open(view.file_path, "w") as outfile:
-            lkml.dump(view.as_dict(), outfile)
 
-        table_name = generator.project.get_model_name(node_name)
-        if table_name in generator.explores:
-            log.debug(f"Building {table_name} explore")
-            explore_config = generator.explores[table_name]
-            explore = generator.build_explore_from_config(explore_config, files)
-            explore_file = "{0}.explore.lkml".format(table_name)
-            explore_path = files.explores_dir.joinpath(explore_file)
-            with open(explore_path, "w") as explore_file:
-                lkml.dump(explore, explore_file)
+@cli.command()
+@click.option(
+    "-d",
+    "--dbt-dir",
+    "dbt_dir",
+    default="./",
+    help='Location of directory DBT project. Does not resolve "~/". Default is "./"',
+    type=click.Path(exists=True, file_okay=False),
+)
+@click.option(
+    "-o",
+    "--output-dir",
+    "output_dir",
+    default="./lookml",
+    help='Destination for generated LookML files; using your current LookML repo is encouraged. Does not resolve "~/". Default is "./lookml"',
+    type=click.Path(file_okay=False),
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    default="./.looker-gen.sock",
+    help='Unix socket to listen on. Default is "./.looker-gen.sock"',
+    type=click.Path(dir_okay=False, path_type=Path),
+)
+def serve(dbt_dir: str, output_dir: str, socket_path: Path) -> None:
+    """
+    Run a local generation server, keeping the dbt project loaded between requests.
+    Speaks newline delimited JSON-RPC 2.0 over a Unix socket.
+    """
+
+    # deferred; Unix sockets are not available on every platform
+    from looker_gen.server import serve
 
-        models = generator.build_explore_export()
-        explore_export_name = "looker-gen.explore.lkml"
-        models_path = files.explores_dir.joinpath(explore_export_name)
-        with open(models_path, "w") as modelfile:
-            lkml.dump(models, modelfile)
+    print(f"Using dbt-dir {dbt_dir} and outputting to {output_dir}")
+    serve(dbt_dir, output_dir, socket_path)
 
 
 @cli.command()
@@ -129,5 +248,8 @@ def validate(looker_dir: str, project_name: str, test_content: bool) -> None:
     Requires your local LookML branch to be pushed to origin (e.g. Github).
     """
 
+    # deferred; the Looker SDK is slow to import and only needed here
+    from looker_gen.looker import linter
+
     print(f"Running with looker-dir {looker_dir}")
     linter(looker_dir, project_name, test_content)
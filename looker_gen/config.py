@@ -3,6 +3,9 @@ from dataclasses import dataclass
 from enum import Enum
 from os import getenv
 from pathlib import Path
+from typing import Optional
+
+from looker_gen.logging import log
 
 
 class ViewDirectoryStructure(Enum):
@@ -32,6 +35,40 @@ class ViewDirectoryStructure(Enum):
         return cls.flat
 
 
+class OutputLayout(Enum):
+    """
+    Sets how generated views and explores are grouped into files.
+
+    `files`: Default; One file per view and per explore
+    `bundled`: Views are bundled into a few files per group (see `BundleBy`),
+    and all explores are output to `explores/looker-gen.explore.lkml`
+    """
+
+    files = "files"
+    bundled = "bundled"
+
+    @classmethod
+    def _missing_(cls, value: object) -> OutputLayout:
+        return cls.files
+
+
+class BundleBy(Enum):
+    """
+    Sets how views are grouped into bundles, with the `bundled` layout.
+    Bundles are output to the directory set by `ViewDirectoryStructure`.
+
+    `directory`: Default; One bundle per view directory, named after the directory
+    `schema`: One bundle per database schema, named after the schema
+    """
+
+    directory = "directory"
+    schema = "schema"
+
+    @classmethod
+    def _missing_(cls, value: object) -> BundleBy:
+        return cls.directory
+
+
 @dataclass(frozen=True)
 class Config:
     """
@@ -40,11 +77,28 @@ class Config:
 
     view_dir_structure: ViewDirectoryStructure
     type_mapping: Path
+    layout: OutputLayout = OutputLayout.files
+    bundle_by: BundleBy = BundleBy.directory
+    # number of files each bundle is split into
+    bundle_files: int = 1
+    # state kept between runs, e.g. the model index; not cached when None
+    cache_dir: Optional[Path] = None
 
     # TODO
     # view_dir: set name of view directory
 
 
+def _get_positive_int(name: str, default: int) -> int:
+    # like the enums above, an invalid value falls back to the default rather
+    # than failing every command on import
+    value = getenv(name, str(default))
+    if value.strip().isdigit() and int(value) > 0:
+        return int(value)
+
+    log.warning(f"{name} must be a positive integer, got {value!r}; using {default}")
+    return default
+
+
 def import_config() -> Config:
     dir_config = getenv("LOOKERGEN_DIR_CONFIG", ViewDirectoryStructure.flat.value)
     view_dir_structure = ViewDirectoryStructure(dir_config)
@@ -54,4 +108,13 @@ def import_config() -> Config:
     if mapping_path:
         type_mapping = Path(mapping_path)
 
-    return Config(view_dir_structure, type_mapping)
+    layout = OutputLayout(getenv("LOOKERGEN_LAYOUT", OutputLayout.files.value))
+    bundle_by = BundleBy(getenv("LOOKERGEN_BUNDLE_BY", BundleBy.directory.value))
+    bundle_files = _get_positive_int("LOOKERGEN_BUNDLE_FILES", 1)
+
+    cache_home = Path(getenv("XDG_CACHE_HOME") or "~/.cache").expanduser()
+    cache_dir = Path(getenv("LOOKERGEN_CACHE_DIR", cache_home.joinpath("looker-gen")))
+
+    return Config(
+        view_dir_structure, type_mapping, layout, bundle_by, bundle_files, cache_dir
+    )
@@ -1,33 +1,50 @@
 import json
+import os
 from pathlib import Path
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 
 import yaml
 
+from looker_gen.logging import log
 from looker_gen.types import ModelName
 
 
+def _read_only_object(obj: Dict[str, Any]) -> Mapping[str, Any]:
+    return MappingProxyType(
+        {k: tuple(v) if isinstance(v, list) else v for k, v in obj.items()}
+    )
+
+
 class FileManager:
-    def __init__(self, output_dir) -> None:
+    def __init__(
+        self, output_dir, provision: bool = True, include_root: Optional[str] = None
+    ) -> None:
         self.pwd = Path.cwd()
         self.output_dir = Path(output_dir)
+        self.include_root = None if include_root is None else Path(include_root)
         self.explores_dir = self.output_dir.joinpath("explores")
         self.views_dir = self.output_dir.joinpath("views")
 
         # provision output dirs
-        for dir in [self.explores_dir, self.views_dir]:
-            if not dir.exists():
-                Path.mkdir(dir, parents=True)
+        if provision:
+            for dir in [self.explores_dir, self.views_dir]:
+                Path.mkdir(dir, parents=True, exist_ok=True)
 
     @staticmethod
-    def load_json(path: Path) -> Dict:
+    def load_json(path: Path, read_only: bool = False) -> Dict:
+        """
+        With `read_only`, objects are loaded as read only mappings and arrays as tuples
+        """
         with open(path, "r") as f:
+            if read_only:
+                return json.load(f, object_hook=_read_only_object)
             return json.load(f)
 
     @staticmethod
-    def load_json_with_prefix(prefix: str, name: str) -> Dict:
+    def load_json_with_prefix(prefix: str, name: str, read_only: bool = False) -> Dict:
         path = Path(prefix).joinpath(name)
-        return FileManager.load_json(path)
+        return FileManager.load_json(path, read_only)
 
     @staticmethod
     def load_yaml(prefix: str, name: str) -> Dict:
@@ -39,8 +56,7 @@ class FileManager:
     def build_models_dir_mapping(
         dbt_path: Path, models_dirs: List[str]
     ) -> Dict[ModelName, Path]:
-        models = dbt_path.joinpath(models_dirs[0]).glob("**/*")
-        return {m.stem: m.parent for m in models if m.suffix == ".sql"}
+        return ModelIndex(dbt_path, models_dirs).get_model_dirs()
 
     def verify_output_dir(self) -> None:
         if not self.output_dir.exists():
@@ -48,3 +64,152 @@ class FileManager:
 
     def fully_qualified_view_path(self, relative_path: Path) -> Path:
         return self.views_dir.joinpath(relative_path)
+
+    def include_path(self, path: Path) -> str:
+        """
+        Path to use in a LookML `include`. With `include_root`, e.g. when the output
+        dir is within a LookML repo, paths are relative to the root of the repo.
+        """
+        if self.include_root is None:
+            return str(path)
+
+        return "/" + path.relative_to(self.include_root).as_posix()
+
+    @staticmethod
+    def write(path: Path, content: str) -> None:
+        FileManager.write_chunks(path, [content])
+
+    @staticmethod
+    def write_chunks(
+        path: Path,
+        chunks: Iterable[str],
+        unchanged: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """
+        Chunks are written to a temporary file, which only replaces `path` once
+        every chunk has been rendered; a failure leaves the existing file intact.
+        When `unchanged` returns True after the last chunk, the existing file is
+        kept as is. Returns whether `path` was written.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "w") as outfile:
+                for chunk in chunks:
+                    outfile.write(chunk)
+
+            if unchanged is not None and unchanged():
+                temp_path.unlink()
+                return False
+
+            os.replace(temp_path, path)
+            return True
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+
+class ModelIndex:
+    """
+    Index of `.sql` model files across every dbt `model-paths` entry.
+
+    Built with `os.scandir`. When `cache_path` is set, each directory's listing
+    is persisted with its mtime; later runs only list directories whose mtime
+    has changed, i.e. where files have been added, removed or renamed.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self, dbt_path: Path, models_dirs: List[str], cache_path: Optional[Path] = None
+    ) -> None:
+        self.dbt_path = dbt_path
+        self.models_dirs = models_dirs
+        self.cache_path = cache_path
+        self.rescanned = 0
+
+        cached: Dict[str, Dict[str, Any]] = {}
+        if cache_path is not None and cache_path.exists():
+            try:
+                cache = FileManager.load_json(cache_path)
+                if cache.get("version") == self.VERSION:
+                    cached = cache["roots"]
+            except ValueError:
+                log.debug(f"Ignoring unreadable model index {cache_path}")
+
+        self.roots = {
+            root: self._scan(dbt_path.joinpath(root), cached.get(root, {}))
+            for root in models_dirs
+        }
+
+        # model name -> (model path, directory relative to the model path)
+        self.models: Dict[ModelName, Tuple[str, str]] = {}
+        for root, dirs in self.roots.items():
+            for relative_dir, listing in dirs.items():
+                for model in listing["models"]:
+                    self.models.setdefault(model, (root, relative_dir))
+
+        if cache_path is not None and (self.rescanned > 0 or self.roots != cached):
+            self._save()
+
+    def _scan(
+        self, root_path: Path, cached: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        listings: Dict[str, Dict[str, Any]] = {}
+        pending = [""]
+
+        while len(pending) > 0:
+            relative_dir = pending.pop()
+            path = root_path.joinpath(relative_dir)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+
+            listing = cached.get(relative_dir)
+            if listing is None or listing["mtime_ns"] != mtime_ns:
+                models, dirs = [], []
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        # linked dirs would be indexed twice, or loop forever
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.name)
+                        elif entry.name.endswith(".sql") and entry.is_file():
+                            models.append(entry.name[: -len(".sql")])
+
+                listing = {
+                    "mtime_ns": mtime_ns,
+                    "models": sorted(models),
+                    "dirs": sorted(dirs),
+                }
+                self.rescanned += 1
+
+            listings[relative_dir] = listing
+            pending.extend(
+                Path(relative_dir).joinpath(d).as_posix() for d in listing["dirs"]
+            )
+
+        return listings
+
+    def _save(self) -> None:
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_path, "w") as f:
+                json.dump({"version": self.VERSION, "roots": self.roots}, f)
+        except OSError as e:
+            log.debug(f"Unable to save model index {self.cache_path}: {e}")
+
+    def get_relative_dir(self, model_name: ModelName) -> Optional[Path]:
+        """
+        Directory of the model, relative to its dbt model path
+        """
+        if model_name not in self.models:
+            return None
+
+        return Path(self.models[model_name][1])
+
+    def get_model_dirs(self) -> Dict[ModelName, Path]:
+        return {
+            model: self.dbt_path.joinpath(root, relative_dir)
+            for model, (root, relative_dir) in self.models.items()
+        }
@@ -1,7 +1,9 @@
+import hashlib
+import json
 from pathlib import Path
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Mapping, Optional, Set
 
-from looker_gen import config
+from looker_gen import config, OutputLayout
 from looker_gen.config import Config
 from looker_gen.files import FileManager
 from looker_gen.project import DBTProject
@@ -19,6 +21,21 @@ from looker_gen.type_mappings import SNOWFLAKE_TYPE_CONVERSIONS
 
 
 LOOKER_DIM_GROUP_TYPES = ["time", "duration"]
+VIEW_FIELDS = {"dimensions", "dimension_groups", "measures"}
+
+
+# Copy values from the read only dbt artifacts into new dicts and lists
+class UnknownModelsError(ValueError):
+    pass
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(v) for v in value]
+
+    return value
 
 
 # Convert to title case and remove table prefixes
@@ -34,13 +51,16 @@ def _format_label(table_name: str) -> str:
 
 
 class LookMLGenerator:
-    def __init__(self, dbt_dir: str) -> None:
+    def __init__(self, dbt_dir: str, type_mappings: Optional[Dict] = None) -> None:
         self.project = DBTProject(dbt_dir)
         self.explores = self.build_explores()
 
-        self.type_mappings = self._get_type_mappings(config)
+        if type_mappings is None:
+            type_mappings = self.get_type_mappings(config)
+        self.type_mappings = type_mappings
 
-    def _get_type_mappings(self, config: Config) -> Dict:
+    @staticmethod
+    def get_type_mappings(config: Config) -> Dict:
         if config.type_mapping is None:
             return SNOWFLAKE_TYPE_CONVERSIONS
 
@@ -54,26 +74,32 @@ class LookMLGenerator:
                 if k.startswith(self.project.model_prefix)
             }
 
-        return {
+        targets = {
             self.project.get_node_name(m.lower().strip()) for m in models.split(",")
         }
+        unknown = targets.difference(self.project.manifest["nodes"].keys())
+        if len(unknown) > 0:
+            names = ", ".join(sorted(self.project.get_model_name(n) for n in unknown))
+            raise UnknownModelsError(f"Unknown models: {names}")
+
+        return targets
 
     def get_column_config(
         self, node_name: NodeName, column_name: str
-    ) -> Dict[str, Any]:
+    ) -> Mapping[str, Any]:
         manifest = self.project.get_manifest_for_node(node_name)
         if column_name in manifest:
             return manifest[column_name]["meta"].get("looker-gen", dict())
 
         return dict()
 
-    def get_table_config(self, node_name: NodeName) -> Dict[str, Any]:
+    def get_table_config(self, node_name: NodeName) -> Mapping[str, Any]:
         return self.project.manifest["nodes"][node_name]["config"]["meta"].get(
             "looker-gen", dict()
         )
 
     def is_dimension(
-        self, node_name: NodeName, column_name: str, catalog: Dict
+        self, node_name: NodeName, column_name: str, catalog: Mapping
     ) -> bool:
         config = self.get_column_config(node_name, column_name)
         ignored = "ignore-dim" in config
@@ -85,7 +111,7 @@ class LookMLGenerator:
         return True
 
     def is_dimension_group(
-        self, node_name: NodeName, column_name: str, catalog: Dict
+        self, node_name: NodeName, column_name: str, catalog: Mapping
     ) -> bool:
         config = self.get_column_config(node_name, column_name)
         ignored = "ignore-dim" in config
@@ -137,7 +163,10 @@ class LookMLGenerator:
             config = self.get_column_config(
                 node_name=node_name, column_name=column_name
             )
-            args = {**args, **{k: v for k, v in config.items() if k != "measures"}}
+            args = {
+                **args,
+                **{k: _thaw(v) for k, v in config.items() if k != "measures"},
+            }
 
         # Match Looker name formatting
         formatted_name = (
@@ -145,9 +174,9 @@ class LookMLGenerator:
         )
         return Dimension(formatted_name, looker_args=args)
 
-    def build_custom_dimension(self, config: Dict[str, Any]) -> Dimension:
+    def build_custom_dimension(self, config: Mapping[str, Any]) -> Dimension:
         args = {
-            k: v
+            k: _thaw(v)
             for k, v in config["meta"]["looker-gen"].items()
             if k not in {"column-type", "looker-only", "measures"}
         }
@@ -195,10 +224,10 @@ class LookMLGenerator:
         catalog = self.project.get_catalog_for_node(node_name)
 
         def parse_measure_args(
-            measure: Dict[str, Any], column_name: str
+            measure: Mapping[str, Any], column_name: str
         ) -> Dict[str, Any]:
             name_in_db = catalog[column_name]["name"]
-            looker_args = {k: v for k, v in measure.items() if k != "name"}
+            looker_args = {k: _thaw(v) for k, v in measure.items() if k != "name"}
             looker_args["sql"] = f'${{TABLE}}."{name_in_db}"'
 
             if (
@@ -246,7 +275,7 @@ class LookMLGenerator:
         metadata = self.project.get_catalog_metadata_for_node(node_name)
         schema: str = metadata["schema"]
         table: str = metadata["name"]
-        config = self.get_table_config(node_name)
+        config = _thaw(self.get_table_config(node_name))
 
         if "view_label" not in config:
             config["view_label"] = _format_label(table)
@@ -258,9 +287,6 @@ class LookMLGenerator:
         relative_path = self.project.build_view_path(model_name)
         path = files.fully_qualified_view_path(relative_path)
 
-        if not path.parent.exists():
-            path.parent.mkdir(parents=True)
-
         return View(
             table.lower(),
             looker_args=config,
@@ -271,12 +297,58 @@ class LookMLGenerator:
             file_path=path,
         )
 
+    @staticmethod
+    def get_fields_fingerprint(view: View) -> str:
+        """
+        Hash of a view's dimensions, dimension groups and measures.
+        Views with the same fingerprint can extend a shared base view.
+        """
+        fields = {k: v for k, v in view.as_dict()["view"].items() if k in VIEW_FIELDS}
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    def build_base_view(self, fingerprint: str, view: View, files: FileManager) -> View:
+        name = f"looker_gen_base_{fingerprint[:12]}"
+        path = files.fully_qualified_view_path(
+            Path("_base").joinpath(f"{name}.view.lkml")
+        )
+        # bundled, the base view shares the bundle of the views extending it
+        if config.layout == OutputLayout.bundled:
+            path = view.file_path
+
+        return View(
+            name,
+            looker_args={"extension": "required"},
+            sql_table_name=None,
+            dimensions=view.dimensions,
+            dimension_groups=view.dimension_groups,
+            measures=view.measures,
+            file_path=path,
+        )
+
+    def build_extending_view(self, view: View, base: View, files: FileManager) -> View:
+        includes = []
+        if base.file_path != view.file_path:
+            includes.append(files.include_path(base.file_path))
+
+        return View(
+            view.name,
+            looker_args=view.looker_args,
+            sql_table_name=view.sql_table_name,
+            dimensions=[],
+            dimension_groups=[],
+            measures=[],
+            file_path=view.file_path,
+            extends=base.name,
+            includes=includes,
+        )
+
     def build_explore_config(
-        self, model_name: ModelName, table_config: Dict[str, Any]
+        self, model_name: ModelName, table_config: Mapping[str, Any]
     ) -> ExploreConfig:
-        def join_config_from_dict(join: Dict[str, Any]) -> JoinConfig:
-            relative_path = self.project.build_view_path(join["name"])
-            looker_args = {k: v for k, v in join.items() if k != "name"}
+        def join_config_from_dict(join: Mapping[str, Any]) -> JoinConfig:
+            # joins may be aliased, the view is named by `from`
+            relative_path = self.project.build_view_path(join.get("from", join["name"]))
+            looker_args = {k: _thaw(v) for k, v in join.items() if k != "name"}
             return JoinConfig(join["name"], looker_args, relative_path)
 
         if table_config["explore"] is None:
@@ -285,7 +357,7 @@ class LookMLGenerator:
         join_configs = table_config.get("explore", {}).get("joins", {})
         joins = [join_config_from_dict(j) for j in join_configs]
         looker_args = {
-            k: v
+            k: _thaw(v)
             for k, v in table_config["explore"].items()
             if k not in ["name", "joins"]
         }
@@ -317,12 +389,17 @@ class LookMLGenerator:
     def build_explore_from_config(
         self, config: ExploreConfig, files: FileManager
     ) -> Dict[str, Any]:
-        join_imports = list(
-            str(files.fully_qualified_view_path(j.relative_path)) for j in config.joins
-        )
-        parent_import = str(
-            files.fully_qualified_view_path(self.project.build_view_path(config.name))
+        join_imports = {
+            files.include_path(files.fully_qualified_view_path(j.relative_path))
+            for j in config.joins
+        }
+        parent_import = files.include_path(
+            files.fully_qualified_view_path(
+                self.project.build_view_path(config.import_name())
+            )
         )
+        # bundled views may share a file with the parent
+        join_imports.discard(parent_import)
 
         args = {**config.looker_args, "name": config.name}
         joins = [j.as_dict() for j in config.joins]
@@ -332,6 +409,19 @@ class LookMLGenerator:
             "explore": {**args, "joins": joins},
         }
 
+    def build_explores_bundle(self, files: FileManager) -> Dict[str, Any]:
+        """
+        All explores in a single document, for the bundled layout
+        """
+        includes = set()
+        explores = []
+        for model_name in sorted(self.explores.keys()):
+            explore = self.build_explore_from_config(self.explores[model_name], files)
+            includes.update(explore["includes"])
+            explores.append(explore["explore"])
+
+        return {"includes": sorted(includes), "explores": explores}
+
     def build_explore_export(self) -> Dict[str, Any]:
         import_string = "/explores/{0}.explore.lkml"
         return {
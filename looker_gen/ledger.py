@@ -0,0 +1,282 @@
+from __future__ import annotations
+import hashlib
+import json
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from looker_gen import config
+from looker_gen.files import FileManager
+from looker_gen.logging import log
+from looker_gen.types import NodeName
+
+
+LEDGER_FILE = ".looker-gen-ledger.json"
+LEDGER_VERSION = 2
+
+# writing a model's view supersedes any base view it previously extended
+COVERED_KINDS = {"view": ["view", "base"]}
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+@dataclass
+class LedgerEntry:
+    nodes: List[NodeName]
+    kind: str
+    sha256: str
+
+
+class FileStats:
+    """
+    Size, mtime and hash of files in the output dir, as of when they were last
+    hashed, so that unchanged files are not read again.
+
+    Stats differ between checkouts of a LookML repo, so they are kept in the
+    cache dir rather than the ledger.
+    """
+
+    VERSION = 1
+
+    def __init__(self, output_dir: Path, cache_dir: Optional[Path]) -> None:
+        self.path: Optional[Path] = None
+        self.stats: Dict[str, List[Any]] = {}
+
+        if cache_dir is not None:
+            key = hashlib.sha256(str(output_dir.resolve()).encode()).hexdigest()
+            self.path = cache_dir.joinpath(f"file-stats-{key[:16]}.json")
+
+        if self.path is not None and self.path.exists():
+            try:
+                stats = FileManager.load_json(self.path)
+                if stats.get("version") == self.VERSION:
+                    self.stats = stats["files"]
+            except ValueError:
+                log.debug(f"Ignoring unreadable file stats {self.path}")
+
+    def hash(self, path: Path, key: str) -> str:
+        stat = path.stat()
+        cached = self.stats.get(key)
+        if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+
+        with open(path, "r") as f:
+            sha256 = content_hash(f.read())
+        self.stats[key] = [stat.st_size, stat.st_mtime_ns, sha256]
+        return sha256
+
+    def record(self, path: Path, key: str, sha256: str) -> None:
+        stat = path.stat()
+        self.stats[key] = [stat.st_size, stat.st_mtime_ns, sha256]
+
+    def forget(self, key: str) -> None:
+        self.stats.pop(key, None)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+
+        stats = {"version": self.VERSION, "files": self.stats}
+        try:
+            FileManager.write(self.path, json.dumps(stats))
+        except OSError as e:
+            log.debug(f"Unable to save file stats {self.path}: {e}")
+
+
+class Ledger:
+    """
+    Record of every file looker-gen has written to the output dir.
+
+    Each entry maps a path (relative to the output dir) to the dbt nodes it was
+    generated from and the hash of its contents. Diffing the ledger against the
+    files written in a run finds orphans without walking the LookML repo.
+    Hashes find hand edits, and files whose rendered content has not changed,
+    which are not rewritten; so the ledger only changes along with the output.
+    """
+
+    def __init__(self, output_dir: Path) -> None:
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir.joinpath(LEDGER_FILE)
+        self.entries: Dict[str, LedgerEntry] = {}
+        self.stats = FileStats(self.output_dir, config.cache_dir)
+
+        # state for the current run
+        self.written: Set[str] = set()
+        self.covered: Set[Tuple[NodeName, str]] = set()
+
+        if self.path.exists():
+            try:
+                ledger = FileManager.load_json(self.path)
+            except ValueError:
+                log.warning(f"Ignoring unreadable ledger {self.path}")
+                ledger = {"version": LEDGER_VERSION, "files": {}}
+
+            # version 1 also recorded file stats, which are now cached
+            if ledger.get("version") in {1, LEDGER_VERSION}:
+                self.entries = {
+                    k: LedgerEntry(v["nodes"], v["kind"], v["sha256"])
+                    for k, v in ledger["files"].items()
+                }
+            else:
+                log.warning(f"Ignoring ledger {self.path} with unknown version")
+
+    def _key(self, path: Path) -> str:
+        return Path(path).relative_to(self.output_dir).as_posix()
+
+    def get(self, path: Path) -> Optional[LedgerEntry]:
+        return self.entries.get(self._key(path))
+
+    def extended_by(self, nodes: Set[NodeName]) -> Set[Path]:
+        """
+        Base views that were last written as extended by any of `nodes`
+        """
+        return {
+            self.output_dir.joinpath(k)
+            for k, v in self.entries.items()
+            if v.kind == "base" and not nodes.isdisjoint(v.nodes)
+        }
+
+    def disk_hash(self, path: Path) -> Optional[str]:
+        """
+        Hash of a file in the output dir, or None when it does not exist.
+        Files are only read when their size or mtime have changed.
+        """
+        if not path.exists():
+            return None
+
+        return self.stats.hash(path, self._key(path))
+
+    def is_modified(self, path: Path) -> bool:
+        """
+        Has a generated file been changed since looker-gen wrote it?
+        """
+        entry = self.get(path)
+        if entry is None or not path.exists():
+            return False
+
+        return self.disk_hash(path) != entry.sha256
+
+    def record(self, path: Path, nodes: List[NodeName], kind: str, sha256: str) -> None:
+        """
+        Record a written file. A base view keeps the nodes it was recorded with
+        whose view has not been written in this run, as they may still extend it;
+        so views must be written before their base views.
+        """
+        entry = self.get(path)
+        if kind == "base" and entry is not None:
+            nodes = [
+                *nodes,
+                *(n for n in entry.nodes if (n, "view") not in self.covered),
+            ]
+
+        self.entries[self._key(path)] = LedgerEntry(
+            nodes=sorted(set(nodes)), kind=kind, sha256=sha256
+        )
+        self.stats.record(path, self._key(path), sha256)
+        self.mark(path, nodes, kind)
+
+    def mark(self, path: Path, nodes: List[NodeName], kind: str) -> None:
+        """
+        Note a file as generated in this run, without recording its contents
+        """
+        self.written.add(self._key(path))
+        self.covered.update(
+            (n, k) for n in nodes for k in COVERED_KINDS.get(kind, [kind])
+        )
+
+    def write(self, path: Path, nodes: List[NodeName], kind: str, content: str) -> None:
+        self.write_chunks(path, nodes, kind, [content])
+
+    def write_chunks(
+        self, path: Path, nodes: List[NodeName], kind: str, chunks: Iterable[str]
+    ) -> None:
+        """
+        Write a file from chunks, hashing as they are written. A file whose
+        content has not changed is left as is.
+        """
+        current = self.disk_hash(path)
+        entry = self.get(path)
+        if entry is not None and current is not None and current != entry.sha256:
+            log.warning(f"{path} has been edited since it was generated, overwriting")
+
+        digest = hashlib.sha256()
+
+        def hashed(chunks: Iterable[str]) -> Iterator[str]:
+            for chunk in chunks:
+                digest.update(chunk.encode())
+                yield chunk
+
+        FileManager.write_chunks(
+            path, hashed(chunks), unchanged=lambda: digest.hexdigest() == current
+        )
+        self.record(path, nodes, kind, digest.hexdigest())
+
+    def orphans(self, live: Dict[str, Set[NodeName]], prefix: str) -> List[Path]:
+        """
+        Files in the ledger that were not written in this run and whose nodes
+        have either been removed from the project or have been written elsewhere.
+
+        `live` maps an entry kind to the nodes that can still produce it; kinds
+        missing from `live` are never orphaned. Only entries for nodes starting
+        with `prefix` are considered, so projects sharing an output dir do not
+        prune each other.
+        """
+
+        def is_orphan(key: str, entry: LedgerEntry) -> bool:
+            if key in self.written or len(entry.nodes) == 0:
+                return False
+
+            if entry.kind not in live:
+                return False
+
+            if not all(n.startswith(f"{prefix}.") for n in entry.nodes):
+                return False
+
+            live_nodes = live[entry.kind]
+            return all(
+                n not in live_nodes or (n, entry.kind) in self.covered
+                for n in entry.nodes
+            )
+
+        return [
+            self.output_dir.joinpath(k)
+            for k, v in sorted(self.entries.items())
+            if is_orphan(k, v)
+        ]
+
+    def prunable(self, live: Dict[str, Set[NodeName]], prefix: str) -> List[Path]:
+        """
+        Orphans that `prune` would delete; those already deleted or edited by
+        hand are left out.
+        """
+        return [
+            path
+            for path in self.orphans(live, prefix)
+            if path.exists() and not self.is_modified(path)
+        ]
+
+    def prune(self, live: Dict[str, Set[NodeName]], prefix: str) -> List[Path]:
+        pruned = []
+        for path in self.orphans(live, prefix):
+            if self.is_modified(path):
+                log.warning(f"Not pruning {path}, it has been edited since generation")
+            elif path.exists():
+                log.debug(f"Pruning orphan {path}")
+                path.unlink()
+                pruned.append(path)
+
+            del self.entries[self._key(path)]
+            self.stats.forget(self._key(path))
+
+        return pruned
+
+    def save(self) -> None:
+        ledger = {
+            "version": LEDGER_VERSION,
+            "files": {k: asdict(v) for k, v in sorted(self.entries.items())},
+        }
+        FileManager.write(self.path, json.dumps(ledger, indent=2))
+
+        self.stats.save()
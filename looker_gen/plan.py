@@ -0,0 +1,72 @@
+import hashlib
+from difflib import unified_diff
+from pathlib import Path
+from typing import Iterable, List
+
+from looker_gen.ledger import Ledger
+from looker_gen.types import NodeName
+
+
+class Plan:
+    """
+    Collects rendered files and compares them to the output dir, without writing.
+
+    Hashes are compared first; the file on disk is only read when its size or
+    mtime have changed since it was last hashed, or to build a diff.
+    """
+
+    def __init__(self, ledger: Ledger, diff: bool = False) -> None:
+        self.ledger = ledger
+        self.diff = diff
+        self.added: List[Path] = []
+        self.changed: List[Path] = []
+        self.unchanged: List[Path] = []
+        self.orphaned: List[Path] = []
+        self.diffs: List[str] = []
+
+    def add(self, path: Path, nodes: List[NodeName], kind: str, content: str) -> None:
+        self.add_chunks(path, nodes, kind, [content])
+
+    def add_chunks(
+        self, path: Path, nodes: List[NodeName], kind: str, chunks: Iterable[str]
+    ) -> None:
+        """
+        Compare a file rendered in chunks; chunks are only kept to build a diff
+        """
+        self.ledger.mark(path, nodes, kind)
+
+        content = None
+        digest = hashlib.sha256()
+        if self.diff:
+            content = "".join(chunks)
+            digest.update(content.encode())
+        else:
+            for chunk in chunks:
+                digest.update(chunk.encode())
+
+        if not path.exists():
+            self.added.append(path)
+            if content is not None:
+                self._add_diff(path, "", content)
+            return
+
+        if self.ledger.disk_hash(path) == digest.hexdigest():
+            self.unchanged.append(path)
+            return
+
+        self.changed.append(path)
+        if content is not None:
+            with open(path, "r") as f:
+                self._add_diff(path, f.read(), content)
+
+    def _add_diff(self, path: Path, before: str, after: str) -> None:
+        lines = unified_diff(
+            before.splitlines(keepends=True),
+            after.splitlines(keepends=True),
+            fromfile=f"a/{path}",
+            tofile=f"b/{path}",
+        )
+        self.diffs.append("".join(lines))
+
+    def has_changes(self) -> bool:
+        return len(self.added) + len(self.changed) + len(self.orphaned) > 0
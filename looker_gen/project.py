@@ -1,11 +1,19 @@
+import hashlib
+import zlib
+from functools import cached_property
 from pathlib import Path
-from typing import Dict
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Set
 
-from looker_gen import config, ViewDirectoryStructure
-from looker_gen.files import FileManager
+from looker_gen import config, BundleBy, OutputLayout, ViewDirectoryStructure
+from looker_gen.files import FileManager, ModelIndex
 from looker_gen.types import ModelName, NodeName
 
 
+def _lower_keys(columns: Mapping[str, Any]) -> Mapping[str, Any]:
+    return MappingProxyType({k.lower(): v for k, v in columns.items()})
+
+
 class DBTProject:
     def __init__(self, dbt_dir) -> None:
         self.dbt_path = Path(dbt_dir)
@@ -16,30 +24,64 @@ class DBTProject:
         self.project_name = project["name"]
         self.model_prefix = f"model.{self.project_name}"
 
-        self.catalog = FileManager.load_json_with_prefix(
-            dbt_target_location, "catalog.json"
-        )
+        self.target_path = dbt_target_location
+        self.models_dirs = models_dirs
+        self.artifact_paths = [
+            self.dbt_path.joinpath("dbt_project.yml"),
+            dbt_target_location.joinpath("catalog.json"),
+            dbt_target_location.joinpath("manifest.json"),
+        ]
+
+        # artifacts are a read only snapshot, so a project can be shared between
+        # generators and threads; anything derived from them is a new object.
+        # Freezing while parsing costs roughly 1.5x a plain json.load
         self.manifest = FileManager.load_json_with_prefix(
-            dbt_target_location, "manifest.json"
+            dbt_target_location, "manifest.json", read_only=True
         )
 
         # make column names lower case for lookups; we are not case sensitive
-        for node_name in self.catalog["nodes"].keys():
-            formatted = {
-                k.lower(): v for k, v in self.get_catalog_for_node(node_name).items()
+        self.manifest_columns: Mapping[NodeName, Mapping] = MappingProxyType(
+            {
+                node_name: _lower_keys(node["columns"])
+                for node_name, node in self.manifest["nodes"].items()
             }
-            self.catalog["nodes"][node_name]["columns"] = formatted
+        )
 
-        for node_name in self.manifest["nodes"].keys():
-            formatted = {
-                k.lower(): v for k, v in self.get_manifest_for_node(node_name).items()
-            }
-            self.manifest["nodes"][node_name]["columns"] = formatted
+    # The catalog and model index are loaded on first use, so that work which
+    # only needs the manifest (e.g. explores) can skip them
+
+    @cached_property
+    def catalog(self) -> Mapping:
+        return FileManager.load_json_with_prefix(
+            self.target_path, "catalog.json", read_only=True
+        )
 
-        self.models_dir_mapping = FileManager.build_models_dir_mapping(
-            self.dbt_path, models_dirs
+    @cached_property
+    def catalog_columns(self) -> Mapping[NodeName, Mapping]:
+        return MappingProxyType(
+            {
+                node_name: _lower_keys(node["columns"])
+                for node_name, node in self.catalog["nodes"].items()
+            }
         )
 
+    @cached_property
+    def model_index(self) -> ModelIndex:
+        # kept out of dbt's target dir, which `dbt clean` removes
+        cache_path = None
+        if config.cache_dir is not None:
+            key = hashlib.sha256(str(self.dbt_path.resolve()).encode()).hexdigest()
+            cache_path = config.cache_dir.joinpath(f"model-index-{key[:16]}.json")
+
+        return ModelIndex(self.dbt_path, self.models_dirs, cache_path=cache_path)
+
+    @cached_property
+    def models_dir_mapping(self) -> Dict[ModelName, Path]:
+        return self.model_index.get_model_dirs()
+
+    def get_artifact_mtimes(self) -> List[int]:
+        return [p.stat().st_mtime_ns for p in self.artifact_paths]
+
     @staticmethod
     def get_model_name(node_name: NodeName) -> ModelName:
         return node_name.split(".")[2]
@@ -47,14 +89,19 @@ class DBTProject:
     def get_node_name(self, table_name: str) -> NodeName:
         return f"{self.model_prefix}.{table_name}"
 
-    def get_catalog_for_node(self, node_name: NodeName) -> Dict:
-        return self.catalog["nodes"][node_name]["columns"]
+    def get_model_nodes(self) -> Set[NodeName]:
+        return {
+            k for k in self.manifest["nodes"].keys() if k.startswith(self.model_prefix)
+        }
 
-    def get_catalog_metadata_for_node(self, node_name: NodeName) -> Dict:
+    def get_catalog_for_node(self, node_name: NodeName) -> Mapping:
+        return self.catalog_columns[node_name]
+
+    def get_catalog_metadata_for_node(self, node_name: NodeName) -> Mapping:
         return self.catalog["nodes"][node_name]["metadata"]
 
-    def get_manifest_for_node(self, node_name: NodeName) -> Dict:
-        return self.manifest["nodes"][node_name]["columns"]
+    def get_manifest_for_node(self, node_name: NodeName) -> Mapping:
+        return self.manifest_columns[node_name]
 
     def _build_view_relative_path(self, node_name: NodeName) -> Path:
         """
@@ -68,8 +115,12 @@ class DBTProject:
             return Path()
 
         elif config.view_dir_structure == ViewDirectoryStructure.dbt:
-            relative_path = Path(manifest["path"])
-            return relative_path.parent
+            relative_path = self.model_index.get_relative_dir(
+                self.get_model_name(node_name)
+            )
+            if relative_path is None:
+                relative_path = Path(manifest["path"]).parent
+            return relative_path
 
         elif config.view_dir_structure == ViewDirectoryStructure.database:
             relative_path = Path(f'{manifest["database"]}/{manifest["schema"]}'.lower())
@@ -78,9 +129,34 @@ class DBTProject:
         else:
             raise ValueError("Unable to build path for view directory config")
 
+    def _build_bundle_name(self, node_name: NodeName, relative_path: Path) -> str:
+        """
+        Build name of the bundle a view is output to, based on BundleBy config
+        """
+        if config.bundle_by == BundleBy.schema:
+            name = self.manifest["nodes"][node_name]["schema"].lower()
+
+        elif config.bundle_by == BundleBy.directory:
+            name = relative_path.name or "views"
+
+        else:
+            raise ValueError("Unable to build bundle for bundle config")
+
+        # crc32 is stable between runs, unlike hash()
+        if config.bundle_files > 1:
+            model_name = self.get_model_name(node_name)
+            shard = zlib.crc32(model_name.encode()) % config.bundle_files
+            name = f"{name}_{shard}"
+
+        return name
+
     def build_view_path(self, model_name: ModelName) -> Path:
         file_name = f"{model_name}.view.lkml"
         node_name = self.get_node_name(model_name)
 
         relative_path = self._build_view_relative_path(node_name)
+        if config.layout == OutputLayout.bundled:
+            bundle_name = self._build_bundle_name(node_name, relative_path)
+            file_name = f"{bundle_name}.view.lkml"
+
         return relative_path.joinpath(file_name)
@@ -0,0 +1,493 @@
+import hashlib
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import lkml
+
+from looker_gen import config, OutputLayout
+from looker_gen.files import FileManager
+from looker_gen.generator import LookMLGenerator
+from looker_gen.ledger import Ledger
+from looker_gen.logging import log
+from looker_gen.plan import Plan
+from looker_gen.types import NodeName, View
+
+
+EXPLORE_EXPORT_NAME = "looker-gen.explore.lkml"
+
+
+def get_schema_targets(schemas: Optional[str]) -> Optional[Set[str]]:
+    if schemas is None:
+        return None
+
+    return {s.lower().strip() for s in schemas.split(",")}
+
+
+@dataclass
+class DedupeReport:
+    """
+    Views that were replaced by thin views extending a shared base view.
+    """
+
+    views: int = 0
+    base_views: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+
+@dataclass
+class RunSummary:
+    """
+    Outcome of generating LookML for a single dbt project.
+    """
+
+    project_name: str
+    views: int = 0
+    explores: List[str] = field(default_factory=list)
+    pruned: int = 0
+    load_seconds: float = 0.0
+    render_seconds: float = 0.0
+    error: Optional[str] = None
+    plan: Optional[Plan] = None
+    dedupe: Optional[DedupeReport] = None
+
+    @property
+    def total_seconds(self) -> float:
+        return self.load_seconds + self.render_seconds
+
+
+def generate_project(
+    dbt_dir: str,
+    output_dir: str,
+    models: Optional[str] = None,
+    schemas: Optional[str] = None,
+    prune: bool = True,
+    type_mappings: Optional[Dict] = None,
+    export: bool = True,
+    plan: bool = False,
+    diff: bool = False,
+    dedupe: bool = False,
+    explores_only: bool = False,
+    include_root: Optional[str] = None,
+) -> RunSummary:
+    """
+    Generate and write views and explores for a dbt project.
+
+    `type_mappings` can be provided when generating many projects, rather
+    than resolving them for each project. Set `export` to False to skip writing
+    `looker-gen.explore.lkml`, e.g. when a combined export is written instead.
+    With `plan`, nothing is written; the rendered files are compared to the
+    output dir and returned as the summary's `plan`. With `dedupe`, views with
+    identical fields extend a shared base view rather than repeating them.
+    With `explores_only`, only explores are generated, from the manifest alone.
+    Set `include_root` when the output dir is within a LookML repo, to make
+    `include` paths relative to the root of the repo.
+    """
+
+    start = perf_counter()
+    # Can we get some configs from dbt_project.yml?
+    files = FileManager(output_dir, provision=not plan, include_root=include_root)
+    ledger = Ledger(files.output_dir)
+    generator = LookMLGenerator(dbt_dir, type_mappings)
+    project = generator.project
+    if not explores_only:
+        # the catalog is loaded on first use; load it here so it is timed as loading
+        project.catalog_columns
+    summary = RunSummary(project.project_name)
+    summary.load_seconds = perf_counter() - start
+
+    emit, emit_chunks = ledger.write, ledger.write_chunks
+    if plan:
+        summary.plan = Plan(ledger, diff)
+        emit, emit_chunks = summary.plan.add, summary.plan.add_chunks
+
+    start = perf_counter()
+    schema_targets = get_schema_targets(schemas=schemas)
+    live = {"explore": {project.get_node_name(e) for e in generator.explores.keys()}}
+    summary.explores = sorted(generator.explores.keys())
+
+    try:
+        if explores_only:
+            targets = _get_explore_targets(generator, models, schema_targets)
+        else:
+            targets = _emit_views(
+                generator,
+                files,
+                ledger,
+                emit_chunks,
+                summary,
+                models,
+                schema_targets,
+                dedupe,
+            )
+            live["view"] = project.get_model_nodes()
+            live["base"] = project.get_model_nodes()
+
+        _emit_explores(generator, files, emit, targets, export)
+    except Exception:
+        # record the files written before the failure, so they are not
+        # mistaken for hand edits on the next run
+        if summary.plan is None:
+            ledger.save()
+        raise
+
+    if summary.plan is not None:
+        if prune:
+            summary.plan.orphaned = ledger.prunable(live, project.model_prefix)
+    else:
+        if prune:
+            summary.pruned = len(ledger.prune(live, project.model_prefix))
+        ledger.save()
+
+    summary.render_seconds = perf_counter() - start
+
+    return summary
+
+
+def _emit_views(
+    generator: LookMLGenerator,
+    files: FileManager,
+    ledger: Ledger,
+    emit_chunks: Callable[[Path, List[NodeName], str, Iterable[str]], None],
+    summary: RunSummary,
+    models: Optional[str],
+    schema_targets: Optional[Set[str]],
+    dedupe: bool,
+) -> List[NodeName]:
+    """
+    Emit views for the targeted models, returning the targets.
+    """
+
+    project = generator.project
+    model_targets = generator.get_model_targets(models)
+    targets: List[NodeName] = []
+
+    for node_name in model_targets:
+        log.debug(f"begin node={node_name}")
+        schema = str(project.get_catalog_metadata_for_node(node_name)["schema"])
+
+        if schema_targets is not None and schema.lower() not in schema_targets:
+            log.debug(
+                f"{node_name} schema {schema} does not match target schemas, skipping"
+            )
+            continue
+
+        targets.append(node_name)
+
+    if config.layout == OutputLayout.bundled:
+        targets = _expand_bundles(generator, targets)
+
+    summary.views = len(targets)
+    views: Dict[NodeName, View] = {}
+
+    def render(node_name: NodeName) -> View:
+        if node_name in views:
+            return views[node_name]
+        return generator.build_view_from_node(node_name, files)
+
+    bases: List[Tuple[View, List[NodeName]]] = []
+    if dedupe:
+        rendered = {n: render(n) for n in targets}
+        # so that a partial run extends the same base views as a full run
+        extended = ledger.extended_by(project.get_model_nodes().difference(targets))
+        bases, deduplicated, summary.dedupe = _deduplicate(
+            generator, files, rendered, extended
+        )
+        views.update(deduplicated)
+
+    # views sharing a file are streamed to it one at a time
+    outputs: Dict[Path, List[NodeName]] = defaultdict(list)
+    for node_name in sorted(targets):
+        relative_path = project.build_view_path(project.get_model_name(node_name))
+        outputs[files.fully_qualified_view_path(relative_path)].append(node_name)
+
+    base_outputs: Dict[Path, List[Tuple[View, List[NodeName]]]] = defaultdict(list)
+    for base, node_names in bases:
+        base_outputs[base.file_path].append((base, node_names))
+
+    for path, node_names in sorted(outputs.items()):
+        log.debug(f"Using view_path {path}")
+        # bundled base views are output with the views extending them
+        bundled_bases = [base for base, _ in base_outputs.pop(path, [])]
+        documents = chain(bundled_bases, (render(n) for n in node_names))
+        chunks = _join_lookml(lkml.dump(view.as_dict()) for view in documents)
+        emit_chunks(path, node_names, "view", chunks)
+
+    # after the views, so the ledger knows which views no longer extend a base
+    for path, group in sorted(base_outputs.items()):
+        base_nodes = [n for _, node_names in group for n in node_names]
+        chunks = _join_lookml(lkml.dump(base.as_dict()) for base, _ in group)
+        emit_chunks(path, base_nodes, "base", chunks)
+
+    return targets
+
+
+def _get_explore_targets(
+    generator: LookMLGenerator,
+    models: Optional[str],
+    schema_targets: Optional[Set[str]],
+) -> List[NodeName]:
+    """
+    Model targets for explores, selected from the manifest rather than the catalog
+    """
+
+    project = generator.project
+    if models is None:
+        model_targets = {project.get_node_name(e) for e in generator.explores.keys()}
+    else:
+        model_targets = generator.get_model_targets(models)
+
+    return [
+        n
+        for n in sorted(model_targets)
+        if schema_targets is None
+        or project.manifest["nodes"][n]["schema"].lower() in schema_targets
+    ]
+
+
+def _emit_explores(
+    generator: LookMLGenerator,
+    files: FileManager,
+    emit: Callable[[Path, List[NodeName], str, str], None],
+    targets: List[NodeName],
+    export: bool,
+) -> None:
+    project = generator.project
+    if config.layout == OutputLayout.bundled:
+        explores_path = files.explores_dir.joinpath(EXPLORE_EXPORT_NAME)
+        explore_nodes = [project.get_node_name(e) for e in generator.explores.keys()]
+        explores = generator.build_explores_bundle(files)
+        emit(explores_path, explore_nodes, "explore", lkml.dump(explores))
+        return
+
+    for node_name in targets:
+        table_name = project.get_model_name(node_name)
+        if table_name in generator.explores:
+            log.debug(f"Building {table_name} explore")
+            explore_config = generator.explores[table_name]
+            explore = generator.build_explore_from_config(explore_config, files)
+            explore_file = "{0}.explore.lkml".format(table_name)
+            explore_path = files.explores_dir.joinpath(explore_file)
+            emit(explore_path, [node_name], "explore", lkml.dump(explore))
+
+    if export:
+        models_path = files.explores_dir.joinpath(EXPLORE_EXPORT_NAME)
+        export_lookml = generator.build_explore_export()
+        emit(models_path, [], "export", lkml.dump(export_lookml))
+
+
+def _join_lookml(documents: Iterable[str]) -> Iterator[str]:
+    for i, document in enumerate(documents):
+        if i > 0:
+            yield "\n\n"
+        yield document
+
+
+def _expand_bundles(
+    generator: LookMLGenerator, targets: List[NodeName]
+) -> List[NodeName]:
+    """
+    A bundle is always written whole, so include every model sharing a bundle
+    with the targets, regardless of model or schema filters.
+    """
+
+    project = generator.project
+
+    def bundle_path(node_name: NodeName) -> Path:
+        return project.build_view_path(project.get_model_name(node_name))
+
+    bundles = {bundle_path(n) for n in targets}
+    return [n for n in generator.get_model_targets(None) if bundle_path(n) in bundles]
+
+
+def _deduplicate(
+    generator: LookMLGenerator,
+    files: FileManager,
+    views: Dict[NodeName, View],
+    extended: Set[Path],
+) -> Tuple[List[Tuple[View, List[NodeName]]], Dict[NodeName, View], DedupeReport]:
+    """
+    Views sharing a fingerprint are replaced by a view per model that extends
+    a base view with the fields; other views are left as is. With the bundled
+    layout, only views within the same bundle share a base view.
+    `extended` are base views extended by models outside of `views`, which a
+    view with the same fingerprint extends even when it is the only one.
+    Returns base views with the nodes extending them, and the views to output.
+    """
+
+    report = DedupeReport()
+    groups: Dict[str, List[NodeName]] = defaultdict(list)
+    for node_name, view in views.items():
+        fingerprint = generator.get_fields_fingerprint(view)
+        if config.layout == OutputLayout.bundled:
+            # a base view is output to the bundle of the views extending it, so
+            # they are always written together; views are only grouped by bundle
+            bundle = view.file_path.relative_to(files.views_dir).as_posix()
+            fingerprint = hashlib.sha256(f"{bundle}:{fingerprint}".encode()).hexdigest()
+        groups[fingerprint].append(node_name)
+
+    bases = []
+    deduplicated = dict(views)
+    for fingerprint, node_names in sorted(groups.items()):
+        node_names = sorted(node_names)
+        base = generator.build_base_view(fingerprint, views[node_names[0]], files)
+        if len(node_names) == 1 and base.file_path not in extended:
+            continue
+
+        bases.append((base, node_names))
+        report.base_views += 1
+        report.bytes_after += len(lkml.dump(base.as_dict()))
+
+        for node_name in node_names:
+            view = views[node_name]
+            extending = generator.build_extending_view(view, base, files)
+            deduplicated[node_name] = extending
+            report.views += 1
+            report.bytes_before += len(lkml.dump(view.as_dict()))
+            report.bytes_after += len(lkml.dump(extending.as_dict()))
+
+    return bases, deduplicated, report
+
+
+@dataclass(frozen=True)
+class BatchProject:
+    """
+    A dbt project within a `gen-batch` config.
+    """
+
+    dbt_dir: Path
+    output_subdir: str
+    schemas: Optional[str] = None
+    models: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, project: Dict[str, Any], base_dir: Path) -> "BatchProject":
+        def as_csv(value: Any) -> Optional[str]:
+            if value is None or isinstance(value, str):
+                return value
+            return ",".join(value)
+
+        return cls(
+            dbt_dir=base_dir.joinpath(project["dbt_dir"]),
+            output_subdir=project["output_subdir"],
+            schemas=as_csv(project.get("schemas")),
+            models=as_csv(project.get("models")),
+        )
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+@dataclass(frozen=True)
+class BatchConfig:
+    """
+    Config for `gen-batch`; paths within the config are relative to the config file.
+    ```
+    output_dir: ./lookml
+    workers: 4
+    projects:
+      - dbt_dir: ../sales
+        output_subdir: sales
+        schemas: [analytics, finance]
+    ```
+    """
+
+    output_dir: Path
+    projects: List[BatchProject]
+    workers: int = field(default_factory=default_workers)
+    prune: bool = True
+
+    @classmethod
+    def load(cls, config_path: Path) -> "BatchConfig":
+        batch = FileManager.load_yaml(str(config_path.parent), config_path.name)
+        base_dir = config_path.parent
+        projects = [BatchProject.from_dict(p, base_dir) for p in batch["projects"]]
+
+        subdirs = [p.output_subdir.strip("/") for p in projects]
+        if "" in subdirs or len(set(subdirs)) != len(subdirs):
+            raise ValueError("Each project needs a distinct, non-empty output_subdir")
+
+        workers = batch.get("workers", default_workers())
+        if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+            raise ValueError(f"workers must be a positive integer, got {workers!r}")
+
+        return cls(
+            output_dir=base_dir.joinpath(batch.get("output_dir", "lookml")),
+            projects=projects,
+            workers=workers,
+            prune=batch.get("prune", True),
+        )
+
+
+def generate_batch(
+    config_path: Path, workers: Optional[int] = None
+) -> List[RunSummary]:
+    """
+    Generate many dbt projects into subdirectories of a single output dir.
+
+    Projects run concurrently on a shared pool and share the resolved type
+    mappings. One `looker-gen.explore.lkml` including the explores of every
+    project is written to the root of the output dir; a project that fails keeps
+    the includes it had before. Include paths are relative to the output dir.
+    """
+
+    batch = BatchConfig.load(config_path)
+    output_dir = batch.output_dir
+    projects = batch.projects
+    type_mappings = LookMLGenerator.get_type_mappings(config)
+
+    def run(project: BatchProject) -> RunSummary:
+        try:
+            return generate_project(
+                dbt_dir=str(project.dbt_dir),
+                output_dir=str(output_dir.joinpath(project.output_subdir)),
+                models=project.models,
+                schemas=project.schemas,
+                prune=batch.prune,
+                type_mappings=type_mappings,
+                export=False,
+                include_root=str(output_dir),
+            )
+        except Exception as e:
+            log.exception(f"Failed to generate {project.dbt_dir}")
+            return RunSummary(project.output_subdir, error=str(e))
+
+    with ThreadPoolExecutor(max_workers=workers or batch.workers) as pool:
+        summaries = list(pool.map(run, projects))
+
+    files = FileManager(str(output_dir))
+    models_path = files.explores_dir.joinpath(EXPLORE_EXPORT_NAME)
+    previous = []
+    if models_path.exists():
+        with open(models_path, "r") as f:
+            previous = lkml.load(f).get("includes", [])
+
+    import_string = "/{0}/explores/{1}"
+    includes = set()
+    for p, s in zip(projects, summaries):
+        if s.error is not None:
+            # keep the explores of a failed project, rather than dropping them
+            prefix = "/{0}/".format(p.output_subdir.strip("/"))
+            includes.update(i for i in previous if i.startswith(prefix))
+            continue
+
+        explore_files = [f"{e}.explore.lkml" for e in s.explores]
+        if config.layout == OutputLayout.bundled and len(s.explores) > 0:
+            explore_files = [EXPLORE_EXPORT_NAME]
+
+        includes.update(
+            import_string.format(p.output_subdir.strip("/"), f) for f in explore_files
+        )
+
+    ledger = Ledger(files.output_dir)
+    ledger.write(models_path, [], "export", lkml.dump({"includes": sorted(includes)}))
+    ledger.save()
+
+    return summaries
@@ -0,0 +1,234 @@
+import errno
+import json
+import socket
+import socketserver
+from inspect import signature
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+
+import lkml
+
+from looker_gen import config, OutputLayout
+from looker_gen.files import FileManager
+from looker_gen.generator import LookMLGenerator
+from looker_gen.ledger import Ledger
+from looker_gen.logging import log
+
+
+# https://www.jsonrpc.org/specification#error_object
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class GeneratorService:
+    """
+    Keeps a parsed dbt project and generator resident between requests.
+
+    dbt artifacts are checked by mtime before each request and reloaded when
+    they have changed.
+    """
+
+    def __init__(self, dbt_dir: str, output_dir: str) -> None:
+        self.dbt_dir = dbt_dir
+        self.files = FileManager(output_dir)
+        self.lock = Lock()
+        self.methods: Dict[str, Callable[..., Any]] = {
+            "render_view": self.render_view,
+            "render_explore": self.render_explore,
+            "reload": self.reload,
+            "list_targets": self.list_targets,
+        }
+        self._load()
+
+    def _load(self) -> None:
+        self.generator = LookMLGenerator(self.dbt_dir)
+        self.artifact_mtimes = self.generator.project.get_artifact_mtimes()
+        log.info(f"Loaded dbt project {self.generator.project.project_name}")
+
+    def _refresh(self) -> None:
+        if self.generator.project.get_artifact_mtimes() != self.artifact_mtimes:
+            log.info("dbt artifacts have changed, reloading")
+            self._load()
+
+    def _write(self, path: Path, node_name: str, kind: str, content: str) -> None:
+        # a single view or explore would overwrite the rest of its bundle
+        if config.layout == OutputLayout.bundled:
+            raise RPCError(INVALID_PARAMS, "write is not supported by bundled layout")
+
+        ledger = Ledger(self.files.output_dir)
+        ledger.write(path, [node_name], kind, content)
+        ledger.save()
+
+    def render_view(self, model: str, write: bool = False) -> Dict[str, Any]:
+        project = self.generator.project
+        node_name = project.get_node_name(model.lower().strip())
+        if node_name not in project.catalog["nodes"]:
+            raise RPCError(INVALID_PARAMS, f"Unknown model {model}")
+
+        view = self.generator.build_view_from_node(node_name, self.files)
+        content = lkml.dump(view.as_dict())
+        if write:
+            self._write(view.file_path, node_name, "view", content)
+
+        return {"path": str(view.file_path), "content": content}
+
+    def render_explore(self, explore: str, write: bool = False) -> Dict[str, Any]:
+        # explores are keyed by model name, but may be aliased with `name`
+        model_name = next(
+            (k for k, v in self.generator.explores.items() if explore in {k, v.name}),
+            None,
+        )
+        if model_name is None:
+            raise RPCError(INVALID_PARAMS, f"Unknown explore {explore}")
+
+        config = self.generator.explores[model_name]
+        content = lkml.dump(
+            self.generator.build_explore_from_config(config, self.files)
+        )
+        path = self.files.explores_dir.joinpath(f"{model_name}.explore.lkml")
+        if write:
+            node_name = self.generator.project.get_node_name(model_name)
+            self._write(path, node_name, "explore", content)
+
+        return {"path": str(path), "content": content}
+
+    def reload(self) -> Dict[str, Any]:
+        self._load()
+        return {"project": self.generator.project.project_name}
+
+    def list_targets(self) -> Dict[str, List[str]]:
+        project = self.generator.project
+        return {
+            "models": sorted(
+                project.get_model_name(n)
+                for n in self.generator.get_model_targets(None)
+            ),
+            "explores": sorted(self.generator.explores.keys()),
+        }
+
+    def dispatch(self, request: Any) -> Optional[Dict[str, Any]]:
+        """
+        Handle a single JSON-RPC 2.0 request; notifications return None.
+        """
+
+        request_id = request.get("id") if isinstance(request, dict) else None
+        # a request without an id is a notification, which is never answered
+        notification = (
+            isinstance(request, dict) and "method" in request and "id" not in request
+        )
+        try:
+            if not isinstance(request, dict) or "method" not in request:
+                raise RPCError(INVALID_REQUEST, "Invalid request")
+
+            method = self.methods.get(request["method"])
+            if method is None:
+                raise RPCError(METHOD_NOT_FOUND, f"Unknown method {request['method']}")
+
+            params = request.get("params", {})
+            try:
+                if isinstance(params, list):
+                    bound = signature(method).bind(*params)
+                else:
+                    bound = signature(method).bind(**params)
+            except TypeError as e:
+                raise RPCError(INVALID_PARAMS, str(e))
+
+            with self.lock:
+                self._refresh()
+                result = method(*bound.args, **bound.kwargs)
+
+        except RPCError as e:
+            response = {"error": {"code": e.code, "message": e.message}}
+        except Exception as e:
+            log.exception(f"Failed to handle {request}")
+            response = {"error": {"code": SERVER_ERROR, "message": str(e)}}
+        else:
+            response = {"result": result}
+
+        if notification:
+            return None
+
+        return {"jsonrpc": "2.0", "id": request_id, **response}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Newline delimited JSON-RPC; a connection may send any number of requests.
+    """
+
+    server: "GeneratorServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if line.strip() == b"":
+                continue
+
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {"code": PARSE_ERROR, "message": "Parse error"},
+                }
+            else:
+                response = self.server.service.dispatch(request)
+
+            if response is not None:
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+
+
+class GeneratorServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, service: GeneratorService) -> None:
+        self.service = service
+        self.socket_path = socket_path
+
+        # clean up after a server that did not shut down, but never take the
+        # socket from one that is still listening
+        if socket_path.exists():
+            if self._is_listening(socket_path):
+                raise OSError(
+                    errno.EADDRINUSE, "A server is already listening", str(socket_path)
+                )
+            socket_path.unlink()
+
+        super().__init__(str(socket_path), RequestHandler)
+
+    @staticmethod
+    def _is_listening(socket_path: Path) -> bool:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            try:
+                client.connect(str(socket_path))
+            except ConnectionRefusedError:
+                return False
+
+        return True
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+
+def serve(dbt_dir: str, output_dir: str, socket_path: Path) -> None:
+    service = GeneratorService(dbt_dir, output_dir)
+    with GeneratorServer(socket_path, service) as server:
+        print(f"Listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -1,7 +1,7 @@
 from __future__ import annotations
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 
 ModelName = str
@@ -71,18 +71,25 @@ class Measure(LookerType):
 @dataclass
 class View:
     name: str
-    sql_table_name: str
+    sql_table_name: Optional[str]
     dimensions: List[Dimension]
     dimension_groups: List[DimensionGroup]
     measures: List[Measure]
     looker_args: Dict[str, Any]
     file_path: Path
+    extends: Optional[str] = None
+    includes: List[str] = field(default_factory=list)
 
     def as_dict(self) -> Dict:
-        return {
+        view: Dict[str, Any] = {"name": self.name}
+        if self.extends is not None:
+            view["extends__all"] = [[self.extends]]
+        if self.sql_table_name is not None:
+            view["sql_table_name"] = self.sql_table_name
+
+        lookml = {
             "view": {
-                "name": self.name,
-                "sql_table_name": self.sql_table_name,
+                **view,
                 **{k: v for k, v in self.looker_args.items() if k != "explore"},
                 "dimensions": [d.as_dict() for d in sorted(self.dimensions)],
                 "dimension_groups": [
@@ -91,3 +98,8 @@ class View:
                 "measures": [m.as_dict() for m in sorted(self.measures)],
             }
         }
+
+        if len(self.includes) > 0:
+            return {"includes": self.includes, **lookml}
+
+        return lookml
@@ -0,0 +1,53 @@
+import shutil
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+import looker_gen.project
+
+
+FIXTURES_DIR = Path(__file__).parent.joinpath("fixtures")
+
+# modules that import the config at load time
+CONFIG_MODULES = [
+    "looker_gen.generator",
+    "looker_gen.ledger",
+    "looker_gen.project",
+    "looker_gen.runner",
+    "looker_gen.server",
+]
+
+
+@pytest.fixture
+def dbt_dir(tmp_path: Path) -> Path:
+    """
+    A copy of the fixture dbt project, which tests are free to change
+    """
+    return Path(shutil.copytree(FIXTURES_DIR.joinpath("dbt"), tmp_path.joinpath("dbt")))
+
+
+@pytest.fixture
+def output_dir(tmp_path: Path) -> Path:
+    return tmp_path.joinpath("lookml")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path: Path, set_config: Callable[..., None]) -> Path:
+    """
+    Keep the model index out of the user's cache
+    """
+    cache_dir = tmp_path.joinpath("cache")
+    set_config(cache_dir=cache_dir)
+    return cache_dir
+
+
+@pytest.fixture
+def set_config(monkeypatch) -> Callable[..., None]:
+    def set_config(**changes) -> None:
+        patched = replace(looker_gen.project.config, **changes)
+        for module in CONFIG_MODULES:
+            monkeypatch.setattr(f"{module}.config", patched)
+
+    return set_config
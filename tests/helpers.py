@@ -0,0 +1,114 @@
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import lkml
+
+
+def update_artifact(
+    dbt_dir: Path, name: str, update: Callable[[Dict[str, Any]], None]
+) -> None:
+    path = dbt_dir.joinpath("target", name)
+    with open(path, "r") as f:
+        artifact = json.load(f)
+
+    update(artifact)
+    with open(path, "w") as f:
+        json.dump(artifact, f, indent=2)
+
+
+def copy_model(
+    dbt_dir: Path,
+    source: str,
+    name: str,
+    directory: Optional[str] = None,
+    schema: Optional[str] = None,
+) -> None:
+    """
+    Add model `name` to the dbt project, with the same columns and config as `source`
+    """
+
+    def copy_manifest(manifest: Dict[str, Any]) -> None:
+        node = dict(manifest["nodes"][f"model.shop.{source}"])
+        path = Path(node["path"])
+        node["name"] = name
+        node["path"] = Path(directory or path.parent).joinpath(f"{name}.sql").as_posix()
+        node["schema"] = schema or node["schema"]
+        manifest["nodes"][f"model.shop.{name}"] = node
+
+    def copy_catalog(catalog: Dict[str, Any]) -> None:
+        node = dict(catalog["nodes"][f"model.shop.{source}"])
+        node["metadata"] = {
+            **node["metadata"],
+            "name": name.upper(),
+            "schema": schema or node["metadata"]["schema"],
+        }
+        catalog["nodes"][f"model.shop.{name}"] = node
+
+    update_artifact(dbt_dir, "manifest.json", copy_manifest)
+    update_artifact(dbt_dir, "catalog.json", copy_catalog)
+
+    with open(dbt_dir.joinpath("target", "manifest.json"), "r") as f:
+        path = json.load(f)["nodes"][f"model.shop.{name}"]["path"]
+    model_path = dbt_dir.joinpath("models", path)
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    model_path.write_text(f"select * from {source}\n")
+
+
+def remove_model(dbt_dir: Path, name: str) -> None:
+    def remove(artifact: Dict[str, Any]) -> None:
+        del artifact["nodes"][f"model.shop.{name}"]
+
+    update_artifact(dbt_dir, "manifest.json", remove)
+    update_artifact(dbt_dir, "catalog.json", remove)
+
+
+def set_column_type(
+    dbt_dir: Path, node_name: str, column: str, column_type: str
+) -> None:
+    def update(catalog: Dict[str, Any]) -> None:
+        catalog["nodes"][node_name]["columns"][column] = {
+            "name": column,
+            "type": column_type,
+        }
+
+    update_artifact(dbt_dir, "catalog.json", update)
+
+
+def set_meta(dbt_dir: Path, node_name: str, meta: Dict[str, Any]) -> None:
+    """
+    Set the `looker-gen` meta config of a model
+    """
+
+    def update(manifest: Dict[str, Any]) -> None:
+        manifest["nodes"][node_name]["config"]["meta"]["looker-gen"] = meta
+
+    update_artifact(dbt_dir, "manifest.json", update)
+
+
+def load_lookml(output_dir: Path) -> Dict[Path, Dict[str, Any]]:
+    """
+    Parse every LookML file in an output dir, keyed by path relative to it
+    """
+    lookml = {}
+    for path in sorted(output_dir.rglob("*.lkml")):
+        with open(path, "r") as f:
+            lookml[path.relative_to(output_dir)] = lkml.load(f)
+
+    return lookml
+
+
+def assert_includes_exist(output_dir: Path) -> None:
+    """
+    Includes are either paths from the working dir, or rooted at the output dir
+    """
+    for path, document in load_lookml(output_dir).items():
+        for include in document.get("includes", []):
+            included = Path(include)
+            if not include.startswith(str(output_dir)):
+                included = output_dir.joinpath(include.lstrip("/"))
+            assert included.exists(), f"{path} includes missing {include}"
+
+
+def view_names(document: Dict[str, Any]) -> List[str]:
+    return [v["name"] for v in document.get("views", [])]
@@ -0,0 +1,105 @@
+import os
+
+import lkml
+import pytest
+import yaml
+
+from looker_gen.runner import BatchConfig, generate_batch
+
+
+def write_config(path, config):
+    path.write_text(yaml.safe_dump(config))
+    return path
+
+
+def test_load_config(tmp_path):
+    config_path = write_config(
+        tmp_path.joinpath("batch.yaml"),
+        {
+            "output_dir": "out",
+            "projects": [
+                {"dbt_dir": "a", "output_subdir": "a", "schemas": ["x", "y"]},
+                {"dbt_dir": "b", "output_subdir": "b", "models": "m,n"},
+            ],
+        },
+    )
+
+    batch = BatchConfig.load(config_path)
+
+    assert batch.output_dir == tmp_path.joinpath("out")
+    assert batch.prune and batch.workers == (os.cpu_count() or 1)
+    assert [p.dbt_dir for p in batch.projects] == [
+        tmp_path.joinpath("a"),
+        tmp_path.joinpath("b"),
+    ]
+    assert [(p.schemas, p.models) for p in batch.projects] == [
+        ("x,y", None),
+        (None, "m,n"),
+    ]
+
+
+@pytest.mark.parametrize("subdirs", [["a", "a/"], ["a", "/"]])
+def test_load_config_needs_distinct_subdirs(tmp_path, subdirs):
+    projects = [{"dbt_dir": "dbt", "output_subdir": s} for s in subdirs]
+    config_path = write_config(tmp_path.joinpath("b.yaml"), {"projects": projects})
+
+    with pytest.raises(ValueError):
+        BatchConfig.load(config_path)
+
+
+@pytest.mark.parametrize("workers", [0, -1, "4", True])
+def test_load_config_needs_positive_workers(tmp_path, workers):
+    projects = [{"dbt_dir": "dbt", "output_subdir": "a"}]
+    config = {"projects": projects, "workers": workers}
+    config_path = write_config(tmp_path.joinpath("b.yaml"), config)
+
+    with pytest.raises(ValueError, match="workers"):
+        BatchConfig.load(config_path)
+
+
+def test_combined_export(dbt_dir, tmp_path):
+    config_path = write_config(
+        tmp_path.joinpath("batch.yaml"),
+        {
+            "output_dir": "lookml",
+            "projects": [
+                {"dbt_dir": "dbt", "output_subdir": "sales"},
+                {"dbt_dir": "dbt", "output_subdir": "shop", "schemas": "analytics"},
+            ],
+        },
+    )
+    output_dir = tmp_path.joinpath("lookml")
+
+    summaries = generate_batch(config_path)
+    assert [s.error for s in summaries] == [None, None]
+
+    with open(output_dir.joinpath("explores", "looker-gen.explore.lkml")) as f:
+        export = lkml.load(f)
+    assert export["includes"] == [
+        "/sales/explores/fct_sales.explore.lkml",
+        "/shop/explores/fct_sales.explore.lkml",
+    ]
+
+    with open(output_dir.joinpath("shop", "explores", "fct_sales.explore.lkml")) as f:
+        explore = lkml.load(f)
+    assert explore["includes"] == [
+        "/shop/views/fct_sales.view.lkml",
+        "/shop/views/dim_customers.view.lkml",
+    ]
+
+    # a failed project keeps its explores in the export
+    config_path = write_config(
+        config_path,
+        {
+            "output_dir": "lookml",
+            "projects": [
+                {"dbt_dir": "dbt", "output_subdir": "sales"},
+                {"dbt_dir": "missing", "output_subdir": "shop"},
+            ],
+        },
+    )
+    summaries = generate_batch(config_path)
+    assert summaries[0].error is None and summaries[1].error is not None
+
+    with open(output_dir.joinpath("explores", "looker-gen.explore.lkml")) as f:
+        assert lkml.load(f) == export
@@ -0,0 +1,145 @@
+import zlib
+from pathlib import Path
+
+import pytest
+
+from looker_gen import (
+    import_config,
+    BundleBy,
+    OutputLayout,
+    ViewDirectoryStructure,
+)
+from looker_gen.runner import generate_project
+
+from tests.helpers import (
+    assert_includes_exist,
+    copy_model,
+    load_lookml,
+    view_names,
+)
+
+
+@pytest.fixture
+def bundled(set_config):
+    set_config(layout=OutputLayout.bundled)
+
+
+def assert_extends_resolve(output_dir):
+    """
+    Bundled base views are defined in the same file as the views extending them
+    """
+    for path, document in load_lookml(output_dir).items():
+        for view in document.get("views", []):
+            for (extends,) in view.get("extends__all", []):
+                assert extends in view_names(document), f"{path} extends {extends}"
+
+
+def test_dedupe_bundles(dbt_dir, output_dir, bundled, set_config):
+    set_config(view_dir_structure=ViewDirectoryStructure.dbt)
+    copy_model(dbt_dir, "dim_customers", "dim_customers_us")
+    copy_model(dbt_dir, "dim_customers", "stg_customers", "staging", "STAGING")
+    copy_model(dbt_dir, "dim_customers", "stg_customers_eu", "staging", "STAGING")
+
+    summary = generate_project(str(dbt_dir), str(output_dir), dedupe=True)
+    assert summary.dedupe.views == 4 and summary.dedupe.base_views == 2
+
+    lookml = load_lookml(output_dir)
+    marts = lookml[Path("views", "marts", "marts.view.lkml")]
+    staging = lookml[Path("views", "staging", "staging.view.lkml")]
+    assert len([n for n in view_names(marts) if n.startswith("looker_gen_base")]) == 1
+    assert len([n for n in view_names(staging) if n.startswith("looker_gen_base")]) == 1
+    assert "includes" not in marts and "includes" not in staging
+    assert_extends_resolve(output_dir)
+    assert_includes_exist(output_dir)
+
+    # a partial run rewrites the bundles it touches, along with their bases
+    summary = generate_project(
+        str(dbt_dir), str(output_dir), models="dim_customers", dedupe=True
+    )
+    assert summary.views == 3 and summary.pruned == 0
+    assert load_lookml(output_dir) == lookml
+    assert_extends_resolve(output_dir)
+
+
+@pytest.mark.parametrize("value, bundle_files", [("4", 4), ("0", 1), ("four", 1)])
+def test_bundle_files_config(monkeypatch, caplog, value, bundle_files):
+    monkeypatch.setenv("LOOKERGEN_BUNDLE_FILES", value)
+
+    assert import_config().bundle_files == bundle_files
+    assert ("LOOKERGEN_BUNDLE_FILES" in caplog.text) == (value != str(bundle_files))
+
+
+@pytest.mark.parametrize(
+    "changes, bundles",
+    [
+        (
+            {},
+            {"views/views.view.lkml": ["dim_customers", "fct_sales", "stg_orders"]},
+        ),
+        (
+            {"view_dir_structure": ViewDirectoryStructure.dbt},
+            {
+                "views/marts/marts.view.lkml": ["dim_customers", "fct_sales"],
+                "views/staging/staging.view.lkml": ["stg_orders"],
+            },
+        ),
+        (
+            {"bundle_by": BundleBy.schema},
+            {
+                "views/analytics.view.lkml": ["dim_customers", "fct_sales"],
+                "views/staging.view.lkml": ["stg_orders"],
+            },
+        ),
+    ],
+)
+def test_bundle_grouping(dbt_dir, output_dir, bundled, set_config, changes, bundles):
+    set_config(**changes)
+
+    generate_project(str(dbt_dir), str(output_dir))
+
+    lookml = load_lookml(output_dir)
+    explores = lookml.pop(Path("explores", "looker-gen.explore.lkml"))
+    assert {p.as_posix(): view_names(d) for p, d in lookml.items()} == bundles
+    assert [e["name"] for e in explores["explores"]] == ["fct_sales"]
+    # fct_sales and its join dim_customers always share a bundle
+    sales = [output_dir.joinpath(p) for p, n in bundles.items() if "fct_sales" in n]
+    assert explores["includes"] == [str(p) for p in sales]
+    assert_includes_exist(output_dir)
+
+
+def test_bundle_sharding(dbt_dir, output_dir, bundled, set_config):
+    set_config(bundle_files=2)
+    for i in range(8):
+        copy_model(dbt_dir, "stg_orders", f"stg_orders_{i}")
+
+    generate_project(str(dbt_dir), str(output_dir))
+
+    lookml = load_lookml(output_dir.joinpath("views"))
+    assert sorted(lookml.keys()) == [
+        Path("views_0.view.lkml"),
+        Path("views_1.view.lkml"),
+    ]
+    for path, document in lookml.items():
+        shard = int(path.name[len("views_") : -len(".view.lkml")])
+        assert all(zlib.crc32(n.encode()) % 2 == shard for n in view_names(document))
+
+    names = [n for d in lookml.values() for n in view_names(d)]
+    assert len(names) == len(set(names)) == 11
+
+    # shards are stable between runs
+    summary = generate_project(str(dbt_dir), str(output_dir), plan=True)
+    assert not summary.plan.has_changes()
+
+
+def test_targets_expand_to_bundles(dbt_dir, output_dir, bundled, set_config):
+    set_config(view_dir_structure=ViewDirectoryStructure.dbt)
+
+    summary = generate_project(str(dbt_dir), str(output_dir), models="dim_customers")
+
+    assert summary.views == 2
+    lookml = load_lookml(output_dir)
+    assert view_names(lookml[Path("views", "marts", "marts.view.lkml")]) == [
+        "dim_customers",
+        "fct_sales",
+    ]
+    assert Path("views", "staging", "staging.view.lkml") not in lookml
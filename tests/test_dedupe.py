@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from looker_gen.ledger import Ledger
+from looker_gen.runner import generate_project
+
+from tests.helpers import assert_includes_exist, copy_model, load_lookml
+
+
+def test_dedupe(dbt_dir, output_dir):
+    copy_model(dbt_dir, "dim_customers", "dim_customers_us")
+    copy_model(dbt_dir, "dim_customers", "dim_customers_eu")
+
+    summary = generate_project(str(dbt_dir), str(output_dir), dedupe=True)
+
+    assert summary.dedupe.views == 3 and summary.dedupe.base_views == 1
+    assert summary.dedupe.bytes_after < summary.dedupe.bytes_before
+    bases = list(output_dir.joinpath("views", "_base").iterdir())
+    assert len(bases) == 1
+
+    lookml = load_lookml(output_dir)
+    base_name = bases[0].name.split(".")[0]
+    view = lookml[Path("views", "dim_customers_us.view.lkml")]["views"][0]
+    assert view["extends__all"] == [[base_name]]
+    assert view["sql_table_name"] == '"ANALYTICS"."DIM_CUSTOMERS_US"'
+    assert "dimensions" not in view
+    assert_includes_exist(output_dir)
+
+
+def test_partial_dedupe_keeps_base(dbt_dir, output_dir):
+    copy_model(dbt_dir, "dim_customers", "dim_customers_us")
+    copy_model(dbt_dir, "dim_customers", "dim_customers_eu")
+    regional = "dim_customers_us,dim_customers_eu"
+
+    generate_project(str(dbt_dir), str(output_dir), dedupe=True)
+    (base,) = output_dir.joinpath("views", "_base").iterdir()
+
+    generate_project(str(dbt_dir), str(output_dir), models=regional, dedupe=True)
+    assert Ledger(output_dir).get(base).nodes == [
+        "model.shop.dim_customers",
+        "model.shop.dim_customers_eu",
+        "model.shop.dim_customers_us",
+    ]
+
+    # dim_customers still extends the base
+    summary = generate_project(str(dbt_dir), str(output_dir), models=regional)
+    assert summary.pruned == 0 and base.exists()
+    assert_includes_exist(output_dir)
+
+    # until it is regenerated without it
+    summary = generate_project(str(dbt_dir), str(output_dir))
+    assert summary.pruned == 1 and not base.exists()
+    assert_includes_exist(output_dir)
+
+
+def test_partial_dedupe_matches_full_run(dbt_dir, output_dir):
+    copy_model(dbt_dir, "dim_customers", "dim_customers_us")
+
+    generate_project(str(dbt_dir), str(output_dir), dedupe=True)
+    lookml = load_lookml(output_dir)
+
+    summary = generate_project(
+        str(dbt_dir), str(output_dir), models="dim_customers_us", dedupe=True
+    )
+    assert summary.dedupe.views == 1 and summary.dedupe.base_views == 1
+    assert load_lookml(output_dir) == lookml
+
+    summary = generate_project(str(dbt_dir), str(output_dir), dedupe=True, plan=True)
+    assert not summary.plan.has_changes()
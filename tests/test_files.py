@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from looker_gen.files import ModelIndex
+from looker_gen.project import DBTProject
+
+from tests.conftest import FIXTURES_DIR
+
+
+def test_model_index_cache(dbt_dir, cache_dir):
+    dbt_dir.joinpath("snapshots", "legacy").mkdir(parents=True)
+    dbt_dir.joinpath("snapshots", "legacy", "old_orders.sql").touch()
+    cache_path = cache_dir.joinpath("index.json")
+
+    index = ModelIndex(dbt_dir, ["models", "snapshots"], cache_path)
+    assert index.get_relative_dir("stg_orders") == Path("staging")
+    assert index.get_relative_dir("old_orders") == Path("legacy")
+    assert index.get_relative_dir("nope") is None
+
+    index = ModelIndex(dbt_dir, ["models", "snapshots"], cache_path)
+    assert index.rescanned == 0
+
+    dbt_dir.joinpath("models", "staging", "stg_items.sql").touch()
+    index = ModelIndex(dbt_dir, ["models", "snapshots"], cache_path)
+    assert index.rescanned == 1
+    assert index.get_relative_dir("stg_items") == Path("staging")
+
+
+def test_model_index_is_cached_outside_project(dbt_dir, cache_dir):
+    DBTProject(str(dbt_dir)).model_index
+
+    assert len(list(cache_dir.glob("model-index-*.json"))) == 1
+    assert not any(dbt_dir.joinpath("target").glob("*index*"))
+    assert not any(FIXTURES_DIR.joinpath("dbt", "target").glob("*index*"))
+
+
+def test_model_index_skips_linked_dirs(dbt_dir):
+    models = dbt_dir.joinpath("models")
+    models.joinpath("staging", "loop").symlink_to(models, target_is_directory=True)
+    models.joinpath("staging_link").symlink_to(models.joinpath("staging"))
+
+    index = ModelIndex(dbt_dir, ["models"])
+
+    assert index.get_relative_dir("stg_orders") == Path("staging")
+    assert sorted(index.roots["models"]) == ["", "marts", "staging"]
@@ -0,0 +1,118 @@
+import pytest
+
+from looker_gen.ledger import Ledger
+from looker_gen.runner import generate_project
+
+from tests.helpers import remove_model, set_column_type, set_meta
+
+
+def test_removed_model_is_pruned(dbt_dir, output_dir):
+    generate_project(str(dbt_dir), str(output_dir))
+    view = output_dir.joinpath("views", "fct_sales.view.lkml")
+    explore = output_dir.joinpath("explores", "fct_sales.explore.lkml")
+    assert view.exists() and explore.exists()
+
+    remove_model(dbt_dir, "fct_sales")
+    summary = generate_project(str(dbt_dir), str(output_dir))
+
+    assert summary.pruned == 2
+    assert not view.exists() and not explore.exists()
+    ledger = Ledger(output_dir)
+    assert ledger.get(view) is None and ledger.get(explore) is None
+    assert output_dir.joinpath("views", "dim_customers.view.lkml").exists()
+
+
+def test_targeted_runs_leave_other_files(dbt_dir, output_dir):
+    generate_project(str(dbt_dir), str(output_dir))
+    generated = sorted(output_dir.rglob("*.lkml"))
+
+    summary = generate_project(str(dbt_dir), str(output_dir), models="dim_customers")
+    assert summary.views == 1 and summary.pruned == 0
+
+    summary = generate_project(str(dbt_dir), str(output_dir), schemas="staging")
+    assert summary.views == 1 and summary.pruned == 0
+
+    assert sorted(output_dir.rglob("*.lkml")) == generated
+    ledger = Ledger(output_dir)
+    assert all(ledger.get(p) is not None for p in generated)
+
+
+def test_edited_file_is_not_pruned(dbt_dir, output_dir, caplog):
+    generate_project(str(dbt_dir), str(output_dir))
+    view = output_dir.joinpath("views", "fct_sales.view.lkml")
+    view.write_text(view.read_text() + "\n# edited by hand\n")
+
+    remove_model(dbt_dir, "fct_sales")
+    summary = generate_project(str(dbt_dir), str(output_dir))
+
+    assert summary.pruned == 1
+    assert view.exists()
+    assert not output_dir.joinpath("explores", "fct_sales.explore.lkml").exists()
+    assert f"Not pruning {view}" in caplog.text
+
+    # no longer generated, so it is left to the user
+    assert Ledger(output_dir).get(view) is None
+
+
+def test_no_prune_keeps_files(dbt_dir, output_dir):
+    generate_project(str(dbt_dir), str(output_dir))
+    remove_model(dbt_dir, "fct_sales")
+
+    summary = generate_project(str(dbt_dir), str(output_dir), prune=False)
+
+    assert summary.pruned == 0
+    assert output_dir.joinpath("views", "fct_sales.view.lkml").exists()
+    assert output_dir.joinpath("explores", "fct_sales.explore.lkml").exists()
+
+
+def test_failed_render_leaves_files(dbt_dir, output_dir, caplog):
+    generate_project(str(dbt_dir), str(output_dir))
+    views = output_dir.joinpath("views")
+    before = views.joinpath("stg_orders.view.lkml").read_text()
+
+    set_meta(dbt_dir, "model.shop.dim_customers", {"group_label": "Buyers"})
+    set_column_type(dbt_dir, "model.shop.stg_orders", "AREA", "GEOGRAPHY_XYZ")
+    with pytest.raises(KeyError):
+        generate_project(str(dbt_dir), str(output_dir))
+
+    assert views.joinpath("stg_orders.view.lkml").read_text() == before
+    assert "Buyers" in views.joinpath("dim_customers.view.lkml").read_text()
+    assert not any(output_dir.rglob("*.tmp"))
+
+    set_column_type(dbt_dir, "model.shop.stg_orders", "AREA", "VARCHAR")
+    generate_project(str(dbt_dir), str(output_dir))
+    assert "edited" not in caplog.text
+
+
+def test_unchanged_files_are_not_rewritten(dbt_dir, output_dir):
+    generate_project(str(dbt_dir), str(output_dir))
+    ledger = output_dir.joinpath(".looker-gen-ledger.json").read_text()
+    mtimes = {p: p.stat().st_mtime_ns for p in output_dir.rglob("*.lkml")}
+    manifest = dbt_dir.joinpath("target", "manifest.json")
+    before = manifest.read_text()
+
+    set_meta(dbt_dir, "model.shop.dim_customers", {"group_label": "Buyers"})
+    generate_project(str(dbt_dir), str(output_dir))
+
+    view = output_dir.joinpath("views", "dim_customers.view.lkml")
+    changed = [p for p, m in mtimes.items() if p.stat().st_mtime_ns != m]
+    assert changed == [view]
+    assert output_dir.joinpath(".looker-gen-ledger.json").read_text() != ledger
+
+    manifest.write_text(before)
+    generate_project(str(dbt_dir), str(output_dir))
+    assert output_dir.joinpath(".looker-gen-ledger.json").read_text() == ledger
+    assert "size" not in ledger and "mtime" not in ledger
+
+
+def test_unreadable_ledger_is_ignored(dbt_dir, output_dir, caplog):
+    generate_project(str(dbt_dir), str(output_dir))
+    path = output_dir.joinpath(".looker-gen-ledger.json")
+    path.write_text(path.read_text()[:100])
+
+    assert Ledger(output_dir).entries == {}
+    assert "Ignoring unreadable ledger" in caplog.text
+
+    generate_project(str(dbt_dir), str(output_dir))
+    assert len(Ledger(output_dir).entries) == 5
+    assert not any(output_dir.glob(".*.tmp"))
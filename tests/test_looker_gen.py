@@ -1,5 +1,103 @@
-from looker_gen import __version__
+from pathlib import Path
+
+import lkml
+import pytest
+
+from looker_gen import __version__, ViewDirectoryStructure
+from looker_gen.files import FileManager
+from looker_gen.generator import LookMLGenerator
+from looker_gen.runner import generate_project
+
+from tests.helpers import assert_includes_exist, load_lookml, set_meta
 
 
 def test_version():
     assert __version__ == "0.1.0"
+
+
+def render_project(generator: LookMLGenerator, files: FileManager) -> str:
+    rendered = []
+    for node_name in sorted(generator.get_model_targets(None)):
+        view = generator.build_view_from_node(node_name, files)
+        rendered.append(lkml.dump(view.as_dict()))
+
+    for config in generator.explores.values():
+        rendered.append(lkml.dump(generator.build_explore_from_config(config, files)))
+
+    rendered.append(lkml.dump(generator.build_explore_export()))
+    return "\n".join(rendered)
+
+
+def test_generation_leaves_project_unchanged(dbt_dir, output_dir):
+    generator = LookMLGenerator(str(dbt_dir))
+    files = FileManager(output_dir)
+
+    first = render_project(generator, files)
+    second = render_project(generator, files)
+    assert first == second
+
+    target = dbt_dir.joinpath("target")
+    project = generator.project
+    assert project.manifest == FileManager.load_json(
+        target.joinpath("manifest.json"), read_only=True
+    )
+    assert project.catalog == FileManager.load_json(
+        target.joinpath("catalog.json"), read_only=True
+    )
+
+    with pytest.raises(TypeError):
+        project.manifest["nodes"]["model.shop.fct_sales"]["config"]["meta"] = {}
+
+    with pytest.raises(TypeError):
+        project.manifest_columns["model.shop.fct_sales"] = {}
+
+    with pytest.raises(TypeError):
+        project.catalog_columns["model.shop.fct_sales"] = {}
+
+
+def test_explores_only_matches_full_run(dbt_dir, output_dir):
+    generate_project(str(dbt_dir), str(output_dir))
+
+    summary = generate_project(
+        str(dbt_dir), str(output_dir), explores_only=True, plan=True
+    )
+    assert summary.views == 0
+    assert len(summary.plan.unchanged) == 2
+    assert not summary.plan.has_changes()
+
+
+@pytest.mark.parametrize("explores_only", [False, True])
+def test_unknown_model(dbt_dir, output_dir, explores_only):
+    with pytest.raises(ValueError, match="Unknown models: nope, nope_2"):
+        generate_project(
+            str(dbt_dir),
+            str(output_dir),
+            models="fct_sales,nope,nope_2",
+            schemas="analytics",
+            explores_only=explores_only,
+        )
+
+
+@pytest.mark.parametrize("view_dir_structure", list(ViewDirectoryStructure))
+def test_aliased_explore_includes(dbt_dir, output_dir, set_config, view_dir_structure):
+    set_config(view_dir_structure=view_dir_structure)
+    join = {
+        "name": "customers",
+        "from": "dim_customers",
+        "sql_on": "${sales.customer_id} = ${customers.id}",
+        "relationship": "many_to_one",
+    }
+    explore = {"name": "sales", "joins": [join]}
+    set_meta(dbt_dir, "model.shop.fct_sales", {"explore": explore})
+
+    generate_project(str(dbt_dir), str(output_dir))
+
+    lookml = load_lookml(output_dir)
+    explore = lookml[Path("explores", "fct_sales.explore.lkml")]
+    assert [Path(i).name for i in explore["includes"]] == [
+        "fct_sales.view.lkml",
+        "dim_customers.view.lkml",
+    ]
+    assert explore["explores"][0]["from"] == "fct_sales"
+    assert explore["explores"][0]["joins"][0]["from"] == "dim_customers"
+    assert_includes_exist(output_dir)
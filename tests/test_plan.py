@@ -0,0 +1,90 @@
+from click.testing import CliRunner
+
+from looker_gen.cli import cli
+from looker_gen.runner import generate_project
+
+from tests.helpers import copy_model, remove_model
+
+
+def gen(*args):
+    return CliRunner().invoke(cli, ["gen", *map(str, args)])
+
+
+def test_plan(dbt_dir, output_dir):
+    generate_project(str(dbt_dir), str(output_dir))
+    view = output_dir.joinpath("views", "dim_customers.view.lkml")
+    view.write_text(view.read_text().replace("People", "Customers"))
+    copy_model(dbt_dir, "dim_customers", "dim_vendors")
+    remove_model(dbt_dir, "stg_orders")
+    before = {p: p.read_text() for p in output_dir.rglob("*.lkml")}
+
+    summary = generate_project(str(dbt_dir), str(output_dir), plan=True, diff=True)
+    plan = summary.plan
+
+    views = output_dir.joinpath("views")
+    assert plan.added == [views.joinpath("dim_vendors.view.lkml")]
+    assert plan.changed == [view]
+    assert len(plan.unchanged) == 3
+    assert plan.orphaned == [views.joinpath("stg_orders.view.lkml")]
+    assert len(plan.diffs) == 2 and '+  group_label: "People"' in plan.diffs[0]
+
+    # nothing is written
+    assert {p: p.read_text() for p in output_dir.rglob("*.lkml")} == before
+
+    summary = generate_project(str(dbt_dir), str(output_dir), plan=True, prune=False)
+    assert summary.plan.orphaned == []
+
+
+def test_plan_exit_status(dbt_dir, output_dir):
+    result = gen("-d", dbt_dir, "-o", output_dir, "--plan")
+    assert result.exit_code == 1
+    assert not output_dir.exists()
+
+    assert gen("-d", dbt_dir, "-o", output_dir).exit_code == 0
+    result = gen("-d", dbt_dir, "-o", output_dir, "--plan")
+    assert result.exit_code == 0
+    assert "0 added, 0 changed, 5 unchanged, 0 orphaned" in result.output
+
+    remove_model(dbt_dir, "stg_orders")
+    assert gen("-d", dbt_dir, "-o", output_dir, "--plan").exit_code == 1
+    result = gen("-d", dbt_dir, "-o", output_dir, "--plan", "--no-prune")
+    assert result.exit_code == 0
+
+
+def test_plan_orphans_match_prune(dbt_dir, output_dir):
+    generate_project(str(dbt_dir), str(output_dir))
+    views = output_dir.joinpath("views")
+    view = views.joinpath("fct_sales.view.lkml")
+    view.write_text(view.read_text() + "\n# edited by hand\n")
+    remove_model(dbt_dir, "fct_sales")
+
+    # the edited view would not be pruned
+    summary = generate_project(str(dbt_dir), str(output_dir), plan=True)
+    assert summary.plan.orphaned == [
+        output_dir.joinpath("explores", "fct_sales.explore.lkml")
+    ]
+
+    generate_project(str(dbt_dir), str(output_dir))
+    views.joinpath("stg_orders.view.lkml").unlink()
+    remove_model(dbt_dir, "stg_orders")
+
+    # nor would a view that has already been deleted
+    result = gen("-d", dbt_dir, "-o", output_dir, "--plan")
+    assert result.exit_code == 0
+    assert "0 orphaned" in result.output
+
+
+def test_diff_requires_plan(dbt_dir, output_dir):
+    result = gen("-d", dbt_dir, "-o", output_dir, "--diff")
+
+    assert result.exit_code == 2
+    assert "--diff can only be used with --plan" in result.output
+    assert not output_dir.exists()
+
+
+def test_unknown_model_is_a_usage_error(dbt_dir, output_dir):
+    result = gen("-d", dbt_dir, "-o", output_dir, "-m", "fct_sales,nope")
+
+    assert result.exit_code == 2
+    assert "Invalid value for '-m' / '--models': Unknown models: nope" in result.output
+    assert "Traceback" not in result.output
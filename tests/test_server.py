@@ -0,0 +1,123 @@
+import json
+import socket
+from threading import Thread
+
+import pytest
+
+from looker_gen.server import (
+    GeneratorServer,
+    GeneratorService,
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    METHOD_NOT_FOUND,
+)
+
+
+@pytest.fixture
+def service(dbt_dir, output_dir):
+    return GeneratorService(str(dbt_dir), str(output_dir))
+
+
+def test_dispatch_result(service):
+    response = service.dispatch(
+        {"jsonrpc": "2.0", "id": 1, "method": "render_view", "params": ["fct_sales"]}
+    )
+
+    assert response["id"] == 1
+    assert response["result"]["path"].endswith("views/fct_sales.view.lkml")
+    assert "sql_table_name" in response["result"]["content"]
+
+
+def test_dispatch_write(service, output_dir):
+    response = service.dispatch(
+        {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "render_explore",
+            "params": {"explore": "fct_sales", "write": True},
+        }
+    )
+
+    path = output_dir.joinpath("explores", "fct_sales.explore.lkml")
+    assert path.read_text() == response["result"]["content"]
+
+
+@pytest.mark.parametrize(
+    "request_, code",
+    [
+        ([], INVALID_REQUEST),
+        ({"jsonrpc": "2.0", "id": 1}, INVALID_REQUEST),
+        ({"jsonrpc": "2.0", "id": 1, "method": "drop_views"}, METHOD_NOT_FOUND),
+        ({"jsonrpc": "2.0", "id": 1, "method": "render_view"}, INVALID_PARAMS),
+        (
+            {"jsonrpc": "2.0", "id": 1, "method": "reload", "params": {"x": 1}},
+            INVALID_PARAMS,
+        ),
+        (
+            {"jsonrpc": "2.0", "id": 1, "method": "render_view", "params": ["nope"]},
+            INVALID_PARAMS,
+        ),
+    ],
+)
+def test_dispatch_error(service, request_, code):
+    response = service.dispatch(request_)
+
+    assert "result" not in response
+    assert response["error"]["code"] == code
+    assert response["id"] == (1 if isinstance(request_, dict) else None)
+
+
+@pytest.mark.parametrize(
+    "params", [{"model": "fct_sales"}, {"model": "nope"}, {"models": "fct_sales"}]
+)
+def test_notifications_are_not_answered(service, params):
+    request = {"jsonrpc": "2.0", "method": "render_view", "params": params}
+    assert service.dispatch(request) is None
+
+
+def test_socket_roundtrip(service, tmp_path):
+    socket_path = tmp_path.joinpath("looker-gen.sock")
+    with GeneratorServer(socket_path, service) as server:
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        requests = [
+            {"jsonrpc": "2.0", "method": "reload"},
+            {"jsonrpc": "2.0", "id": 1, "method": "list_targets"},
+            {"jsonrpc": "2.0", "method": "render_view", "params": ["nope"]},
+            {"jsonrpc": "2.0", "id": 2, "method": "render_view", "params": ["nope"]},
+        ]
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(socket_path))
+            client.sendall(b"".join(json.dumps(r).encode() + b"\n" for r in requests))
+            client.shutdown(socket.SHUT_WR)
+            with client.makefile("rb") as f:
+                responses = [json.loads(line) for line in f]
+
+        server.shutdown()
+
+    assert [r["id"] for r in responses] == [1, 2]
+    assert responses[0]["result"]["explores"] == ["fct_sales"]
+    assert responses[1]["error"]["code"] == INVALID_PARAMS
+
+
+def test_socket_in_use(service, tmp_path):
+    socket_path = tmp_path.joinpath("looker-gen.sock")
+    with GeneratorServer(socket_path, service) as server:
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        with pytest.raises(OSError, match="already listening"):
+            GeneratorServer(socket_path, service)
+
+        server.shutdown()
+
+
+def test_stale_socket_is_replaced(service, tmp_path):
+    socket_path = tmp_path.joinpath("looker-gen.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(str(socket_path))
+    assert socket_path.exists()
+
+    with GeneratorServer(socket_path, service):
+        assert socket_path.exists()
+
+    assert not socket_path.exists()